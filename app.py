@@ -1,7 +1,9 @@
 import streamlit as st
+import uuid
 from pathlib import Path
 from core.storage import list_projects, load_project
 from core.constants import ASSET_CATEGORIES
+from core import catalog
 
 BASE = Path(__file__).parent
 
@@ -9,6 +11,8 @@ st.set_page_config(page_title="Slot Art Producer (Streamlit)", layout="wide")
 
 def init_state():
     st.session_state.setdefault("active_project_id", None)
+    # fairness key for the shared provider queue (see core.providers.GOVERNOR)
+    st.session_state.setdefault("session_id", uuid.uuid4().hex)
     st.session_state.setdefault("provider", "Gemini")
     st.session_state.setdefault("api_keys", {"Gemini": "", "OpenAI": ""})
     st.session_state.setdefault("provider_models", {
@@ -51,6 +55,9 @@ with st.sidebar:
 
     if st.session_state.active_project_id:
         st.success(f"Active: {st.session_state.active_project_id[:8]}")
+        # from the catalog, so the sidebar never parses project.json
+        counts = catalog.asset_counts(BASE, st.session_state.active_project_id)
+        st.caption(" · ".join(f"{c}: {counts.get(c, 0)}" for c in ASSET_CATEGORIES))
 
 st.write(
     "Use the pages on the left (Streamlit multipage) to create projects, generate assets, preview, and export."
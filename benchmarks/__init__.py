@@ -0,0 +1,8 @@
+# benchmarks/__init__.py
+
+"""
+Reproducible micro/macro benchmarks over synthetic fixtures (no network, no real data/):
+
+    python -m benchmarks.run [--quick] [--only storage,post,preview,export,extract] [-o results.json]
+    python -m benchmarks.run compare before.json after.json [--fail-over 0.2]
+"""
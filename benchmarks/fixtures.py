@@ -0,0 +1,67 @@
+# benchmarks/fixtures.py
+
+"""Synthetic, seeded fixtures: random RGBA images and projects with N asset records."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Tuple
+import random
+
+from PIL import Image
+
+from core.constants import ASSET_CATEGORIES, make_default_preview_config
+from core.models import Asset, Project
+from core.storage import ensure_project_dirs, project_dir, save_project
+
+# sizes the providers actually return (OpenAI square / landscape / portrait, Imagen 1K)
+PROVIDER_SIZES = {"1024x1024": (1024, 1024), "1536x1024": (1536, 1024), "1024x1536": (1024, 1536)}
+
+
+def random_rgba(size: Tuple[int, int], seed: int = 0) -> Image.Image:
+    """Uniform noise: incompressible, so PNG/ZIP numbers are a worst case."""
+    w, h = size
+    return Image.frombytes("RGBA", (w, h), random.Random(seed).randbytes(w * h * 4))
+
+
+def make_project(
+    base: Path,
+    n_assets: int,
+    with_files: int = 0,
+    file_size: Tuple[int, int] = (512, 512),
+    orientation: str = "Landscape",
+    seed: int = 0,
+) -> Project:
+    """
+    Saves a project with n_assets records spread over the categories. Only the first
+    `with_files` assets get a real PNG on disk; the rest point at paths that do not exist,
+    which is enough for the storage and catalog paths.
+    """
+    rng = random.Random(seed)
+    project = Project.new(
+        title=f"bench-{n_assets}",
+        theme="synthetic theme",
+        style_lock="synthetic style",
+        reels=5,
+        rows=3,
+        preview_config=make_default_preview_config(orientation),
+        orientation=orientation,
+    )
+    ensure_project_dirs(base, project.id, ASSET_CATEGORIES)
+    pdir = project_dir(base, project.id)
+    for i in range(n_assets):
+        cat = ASSET_CATEGORIES[i % len(ASSET_CATEGORIES)]
+        rel = f"assets/{cat}/bench_{i:06d}.png"
+        if i < with_files:
+            random_rgba(file_size, seed=seed + i).save(pdir / rel, "PNG", compress_level=1)
+        project.assets.append(Asset.new(
+            category=cat,
+            name=f"bench_{i:06d}",
+            prompt=" ".join(rng.choice(("gold", "ruby", "dragon", "lotus", "seven", "bell", "cherry")) for _ in range(12)),
+            provider="Stub",
+            model="stub-1",
+            path=rel,
+            meta={"size": "1024x1024", "canvas": "1440x810"},
+        ))
+    save_project(base, project)
+    return project
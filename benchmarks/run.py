@@ -0,0 +1,221 @@
+# benchmarks/run.py
+
+"""
+Runs the benchmark suites in a throwaway base directory and writes a JSON report:
+
+    {"meta": {...}, "results": {"<suite>.<case>": {"median_s", "min_s", "mean_s", "runs", "params"}}}
+
+`compare` prints the median ratio per case between two reports (after / before).
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from core import storage
+from core.image_post import to_canvas, to_exact_symbol_size
+from core.pipeline import extract_stages, run_extract
+from core.preview_render import clear_cache, render_preview
+from core.export_utils import zip_project
+from core.providers import StubProvider
+
+from .fixtures import PROVIDER_SIZES, make_project, random_rgba
+
+ROOT = Path(__file__).resolve().parents[1]
+SUITES = ("storage", "post", "preview", "export", "extract")
+
+Results = Dict[str, Dict[str, Any]]
+
+
+def measure(fn: Callable[[], Any], runs: int, setup: Optional[Callable[[], Any]] = None, warmup: int = 1) -> Dict[str, Any]:
+    """Times fn() `runs` times (setup() runs untimed before each call)."""
+    for _ in range(warmup):
+        if setup:
+            setup()
+        fn()
+    times: List[float] = []
+    for _ in range(runs):
+        if setup:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return {
+        "median_s": statistics.median(times),
+        "min_s": min(times),
+        "mean_s": statistics.fmean(times),
+        "runs": runs,
+    }
+
+
+def _record(results: Results, name: str, stats: Dict[str, Any], **params: Any) -> None:
+    results[name] = {**stats, "params": params}
+    print(f"  {name:<44} {stats['median_s'] * 1000:10.2f} ms  (min {stats['min_s'] * 1000:.2f})", flush=True)
+
+
+def bench_storage(base: Path, results: Results, quick: bool) -> None:
+    for n in (10, 1_000) if quick else (10, 1_000, 10_000):
+        project = make_project(base, n)
+        runs = 5 if n >= 10_000 else 20
+        _record(results, f"storage.save_project[{n}]", measure(lambda: storage.save_project(base, project), runs), assets=n)
+        _record(
+            results,
+            f"storage.load_project_cold[{n}]",
+            measure(lambda: storage.load_project(base, project.id), runs, setup=lambda: storage.invalidate_project(base, project.id)),
+            assets=n,
+        )
+        _record(
+            results,
+            f"storage.load_project_lazy_cold[{n}]",
+            measure(lambda: storage.load_project(base, project.id, lazy=True), runs, setup=lambda: storage.invalidate_project(base, project.id)),
+            assets=n,
+        )
+        _record(results, f"storage.load_project_warm[{n}]", measure(lambda: storage.load_project(base, project.id), runs * 10), assets=n)
+    _record(results, "storage.list_projects", measure(lambda: storage.list_projects(base), 50))
+
+
+def bench_post(base: Path, results: Results, quick: bool) -> None:
+    sizes = {"1024x1024": PROVIDER_SIZES["1024x1024"]} if quick else PROVIDER_SIZES
+    for label, size in sizes.items():
+        img = random_rgba(size, seed=1)
+        for mode in ("cover", "contain"):
+            _record(results, f"post.to_canvas_{mode}[{label}]", measure(lambda: to_canvas(img, 1440, 810, mode=mode), 5), size=label, mode=mode)
+        _record(results, f"post.to_exact_symbol_size[{label}]", measure(lambda: to_exact_symbol_size(img), 5), size=label)
+
+
+def bench_preview(base: Path, results: Results, quick: bool) -> None:
+    bg = random_rgba((1440, 810), seed=2)
+    reel_bg = random_rgba((1024, 1024), seed=3)
+    frame = random_rgba((1536, 1024), seed=4)
+    symbol_pool = [random_rgba((158, 178), seed=10 + i) for i in range(12)]
+    window = (400, 170, 640, 420)
+    for rows, reels in ((3, 5),) if quick else ((3, 5), (4, 5), (5, 6), (7, 7)):
+        grid = [[symbol_pool[(r * reels + c) % len(symbol_pool)] for c in range(reels)] for r in range(rows)]
+        keys = {
+            "background": "bg", "reel_bg": "reel", "frame": "frame",
+            "symbols": [[(r * reels + c) % len(symbol_pool) for c in range(reels)] for r in range(rows)],
+        }
+
+        def render(layer_keys=None):
+            return render_preview((1440, 810), bg, reel_bg, frame, grid, window, layer_keys=layer_keys)
+
+        _record(results, f"preview.render_cold[{rows}x{reels}]", measure(render, 5, setup=clear_cache), rows=rows, reels=reels)
+        _record(results, f"preview.render_cached[{rows}x{reels}]", measure(lambda: render(keys), 20), rows=rows, reels=reels)
+
+
+def bench_export(base: Path, results: Results, quick: bool) -> None:
+    n_files = 8 if quick else 24
+    project = make_project(base, 200, with_files=n_files)
+    pdir = storage.project_dir(base, project.id)
+    _record(results, f"export.zip_project[{n_files}x512px]", measure(lambda: zip_project(pdir), 3), files=n_files)
+
+
+def bench_extract(base: Path, results: Results, quick: bool) -> None:
+    project = make_project(base, 0)
+    symbols = 4 if quick else 8
+    stages = extract_stages(project, symbols_count=symbols, transparent=True)
+    provider = StubProvider()
+
+    def extract():
+        run_extract(base, project, provider, "Stub", "", "stub-1", "1024x1024", stages, force_fresh=True)
+
+    _record(results, f"extract.end_to_end[{symbols} symbols]", measure(extract, 3), symbols=symbols, provider="Stub")
+
+
+_SUITES: Dict[str, Callable[[Path, Results, bool], None]] = {
+    "storage": bench_storage,
+    "post": bench_post,
+    "preview": bench_preview,
+    "export": bench_export,
+    "extract": bench_extract,
+}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def run(suites: List[str], quick: bool) -> Dict[str, Any]:
+    results: Results = {}
+    base = Path(tempfile.mkdtemp(prefix="slot-bench-"))
+    try:
+        for name in suites:
+            print(f"[{name}]", flush=True)
+            _SUITES[name](base, results, quick)
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "created_at": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "quick": quick,
+        },
+        "results": results,
+    }
+
+
+def compare(before: Dict[str, Any], after: Dict[str, Any], fail_over: Optional[float]) -> int:
+    """Prints after/before median ratios; returns 1 if any case slowed down by more than fail_over."""
+    a, b = before["results"], after["results"]
+    print(f"before {before['meta'].get('commit')}  after {after['meta'].get('commit')}")
+    regressions = 0
+    for name in sorted(set(a) | set(b)):
+        if name not in a or name not in b:
+            print(f"  {name:<44} {'only in ' + ('before' if name in a else 'after'):>30}")
+            continue
+        ratio = b[name]["median_s"] / a[name]["median_s"] if a[name]["median_s"] else float("inf")
+        flag = ""
+        if fail_over is not None and ratio > 1 + fail_over:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"  {name:<44} {a[name]['median_s'] * 1000:10.2f} -> {b[name]['median_s'] * 1000:10.2f} ms  x{ratio:.2f}{flag}")
+    return 1 if regressions else 0
+
+
+def main(argv: List[str]) -> int:
+    if argv[:1] == ["compare"]:
+        p = argparse.ArgumentParser(prog="python -m benchmarks.run compare")
+        p.add_argument("before")
+        p.add_argument("after")
+        p.add_argument("--fail-over", type=float, default=None, help="exit 1 if a median grows by more than this fraction")
+        args = p.parse_args(argv[1:])
+        load = lambda path: json.loads(Path(path).read_text(encoding="utf-8"))
+        return compare(load(args.before), load(args.after), args.fail_over)
+
+    p = argparse.ArgumentParser(prog="python -m benchmarks.run")
+    p.add_argument("--only", default=",".join(SUITES), help="comma-separated subset of: " + ", ".join(SUITES))
+    p.add_argument("--quick", action="store_true", help="smaller fixtures and fewer cases")
+    p.add_argument("-o", "--output", default=None, help="JSON report path (default: bench-<commit>.json)")
+    args = p.parse_args(argv)
+    suites = [s for s in args.only.split(",") if s]
+    unknown = [s for s in suites if s not in _SUITES]
+    if unknown:
+        p.error("unknown suite(s): " + ", ".join(unknown))
+
+    report = run(suites, args.quick)
+    out = Path(args.output or f"bench-{report['meta']['commit'] or 'local'}.json")
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"wrote {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1 @@
+# conftest.py: puts the repo root on sys.path so tests can `import core`
@@ -0,0 +1,287 @@
+# core/batch.py
+
+"""
+Headless batch mode: creates and fills many projects from a JSON spec, then exports them.
+
+    python -m core.batch run spec.json [--concurrency N] [--provider Stub] [--out DIR]
+    python -m core.batch status spec.json
+
+Spec (per-project keys override the top-level defaults):
+
+    {
+      "name": "autumn",                      # optional, defaults to the file name
+      "provider": "OpenAI", "model": "gpt-image-1", "size": "1024x1024", "transparent": true,
+      "concurrency": 4,                      # provider calls in flight across ALL projects
+      "export": {"profile": "raw", "out": "exports"},   # or false
+      "projects": [
+        {"key": "dragon", "title": "Dragon Gold", "theme": "...", "style_lock": "...",
+         "reels": 5, "rows": 3, "orientation": "Landscape",
+         "categories": {"Background": 1, "ReelBackground": 1, "Frame": 1, "Symbols": 10},
+         "prompts": {"Symbols": "..."}}      # optional per-category prompt overrides
+      ]
+    }
+
+Progress is kept in data/batch/<name>.json. Rerunning the same spec resumes: exported
+projects are skipped and each category only generates the images it is still missing.
+API keys come from OPENAI_API_KEY / GEMINI_API_KEY; provider "Stub" runs offline.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import os
+import shutil
+import threading
+import time
+
+from .constants import ASSET_CATEGORIES, DEFAULT_REELS, DEFAULT_ROWS, make_default_preview_config
+from .export_utils import build_export
+from .models import Project
+from .pipeline import canvas_size, extract_stages, save_result
+from .providers import PRIORITY_BACKGROUND, PROVIDERS, ImageProvider, StubProvider, _split, generate_fanout
+from .storage import compact_project, ensure_project_dirs, load_project, project_dir, save_project
+
+BATCH_CONCURRENCY = 4
+API_KEY_ENV = {"OpenAI": "OPENAI_API_KEY", "Gemini": "GEMINI_API_KEY"}
+
+_DEFAULTS = {
+    "provider": "OpenAI",
+    "model": "gpt-image-1",
+    "size": "1024x1024",
+    "transparent": False,
+}
+
+
+def _provider(key: str) -> ImageProvider:
+    if key == "Stub":
+        return StubProvider()
+    if key not in PROVIDERS:
+        raise ValueError(f"unknown provider {key!r} (expected one of {', '.join([*PROVIDERS, 'Stub'])})")
+    return PROVIDERS[key]
+
+
+def _api_key(provider_key: str) -> str:
+    env = API_KEY_ENV.get(provider_key)
+    if env is None:
+        return ""
+    key = os.environ.get(env, "").strip()
+    if not key:
+        raise SystemExit(f"{env} is not set")
+    return key
+
+
+def load_spec(path: Path) -> Dict[str, Any]:
+    spec = json.loads(path.read_text(encoding="utf-8"))
+    spec.setdefault("name", path.stem)
+    keys = [p.get("key") for p in spec.get("projects", [])]
+    if not keys or None in keys or len(set(keys)) != len(keys):
+        raise ValueError("spec needs a non-empty 'projects' list with a unique 'key' per project")
+    for p in spec["projects"]:
+        unknown = [c for c in p.get("categories", {}) if c not in ASSET_CATEGORIES]
+        if unknown:
+            raise ValueError(f"{p['key']}: unknown categories {unknown}")
+    return spec
+
+
+def _setting(spec: Dict[str, Any], item: Dict[str, Any], name: str) -> Any:
+    return item.get(name, spec.get(name, _DEFAULTS[name]))
+
+
+class BatchState:
+    """data/batch/<name>.json: per spec key, the project id and how far it got."""
+
+    def __init__(self, base: Path, name: str):
+        self.path = base / "data" / "batch" / f"{name}.json"
+        self._lock = threading.Lock()
+        self.projects: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            self.projects = json.loads(self.path.read_text(encoding="utf-8")).get("projects", {})
+
+    def update(self, key: str, **changes: Any) -> None:
+        with self._lock:
+            self.projects.setdefault(key, {}).update(changes, updated_at=time.time())
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps({"projects": self.projects}, indent=2), encoding="utf-8")
+            os.replace(tmp, self.path)
+
+
+def _ensure_project(base: Path, state: BatchState, item: Dict[str, Any]) -> Project:
+    pid = state.projects.get(item["key"], {}).get("project_id")
+    if pid and (project_dir(base, pid) / "project.json").exists():
+        return load_project(base, pid, lazy=True)
+    orientation = item.get("orientation", "Landscape")
+    project = Project.new(
+        title=item.get("title", item["key"]),
+        theme=item.get("theme", ""),
+        style_lock=item.get("style_lock", ""),
+        reels=int(item.get("reels", DEFAULT_REELS)),
+        rows=int(item.get("rows", DEFAULT_ROWS)),
+        preview_config=make_default_preview_config(orientation),
+        orientation=orientation,
+    )
+    ensure_project_dirs(base, project.id, ASSET_CATEGORIES)
+    save_project(base, project)
+    state.update(item["key"], project_id=project.id, status="generating")
+    return project
+
+
+def _prompt(project: Project, category: str, item: Dict[str, Any], transparent: bool) -> Tuple[str, bool]:
+    """(prompt, transparent) for a category: spec override, else the Extract/Generator defaults."""
+    stages = {s.category: s for s in extract_stages(project, 1, transparent)}
+    stage = stages.get(category)
+    if stage:
+        prompt, transparent = stage.prompt, stage.transparent
+    elif category == "Mockups":
+        prompt = (
+            f"{project.theme}. {project.style_lock}\n\n"
+            "Create ONE complete slot game mockup screenshot.\n"
+            "Include: background environment + reel window panel + ornate frame overlay + reels filled with symbol icons.\n"
+            "No UI buttons, no logos, no text labels.\n"
+        )
+        transparent = False
+    else:
+        prompt = f"{project.theme}. {project.style_lock}\n\nGenerate {category} asset."
+    return item.get("prompts", {}).get(category, prompt), transparent
+
+
+def _plan(spec: Dict[str, Any], item: Dict[str, Any], project: Project) -> List[Dict[str, Any]]:
+    """One unit per provider call: the categories' missing images split into chunks of at most max_n."""
+    provider_key = _setting(spec, item, "provider")
+    model = _setting(spec, item, "model")
+    max_n = max(1, _provider(provider_key).caps(model).max_n)
+    units = []
+    for category, want in item.get("categories", {}).items():
+        missing = int(want) - len(project.by_category(category))
+        if missing <= 0:
+            continue
+        prompt, transparent = _prompt(project, category, item, bool(_setting(spec, item, "transparent")))
+        for i, n in enumerate(_split(missing, max_n)):
+            units.append({
+                "key": item["key"], "project": project, "category": category, "chunk": i, "n": n,
+                "prompt": prompt, "transparent": transparent, "provider_key": provider_key,
+                "model": model, "size": _setting(spec, item, "size"),
+            })
+    return units
+
+
+def _run_unit(base: Path, spec_name: str, unit: Dict[str, Any], api_keys: Dict[str, str]) -> List[str]:
+    project = unit["project"]
+    res = generate_fanout(
+        _provider(unit["provider_key"]),
+        api_key=api_keys[unit["provider_key"]],
+        model=unit["model"],
+        prompt=unit["prompt"],
+        size=unit["size"],
+        n=unit["n"],
+        transparent=unit["transparent"],
+        priority=PRIORITY_BACKGROUND,
+        session=f"batch:{spec_name}",
+    )
+    tw, th = canvas_size(project)
+    # chunk index in the name: sibling chunks may finish within the same second
+    return save_result(
+        base, project, unit["category"], f'{unit["category"].lower()}{unit["chunk"]:02d}', unit["prompt"], res,
+        unit["provider_key"], unit["model"],
+        meta={"size": unit["size"], "n": unit["n"], "canvas": f"{tw}x{th}", "orientation": project.orientation, "batch": spec_name},
+    )
+
+
+def _export(base: Path, project_id: str, profile: str, out_dir: Path, key: str) -> Path:
+    compact_project(base, project_id)
+    f, _ = build_export(base, project_id, profile=profile)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    dst = out_dir / f"{key}.zip"
+    tmp = dst.with_suffix(".zip.tmp")
+    with f, open(tmp, "wb") as out:
+        shutil.copyfileobj(f, out, 1024 * 1024)
+    os.replace(tmp, dst)
+    return dst
+
+
+def run_batch(
+    base: Path,
+    spec: Dict[str, Any],
+    concurrency: Optional[int] = None,
+    out_dir: Optional[Path] = None,
+    log=print,
+) -> Dict[str, Dict[str, Any]]:
+    """Runs (or resumes) a spec and returns the final per-project state."""
+    state = BatchState(base, spec["name"])
+    concurrency = max(1, int(concurrency or spec.get("concurrency", BATCH_CONCURRENCY)))
+    export = spec.get("export", {"profile": "raw"})
+    out_dir = out_dir or (Path(export.get("out", "exports")) if export else None)
+
+    items = [p for p in spec["projects"] if state.projects.get(p["key"], {}).get("status") != "exported"]
+    providers = {_setting(spec, p, "provider") for p in items}
+    api_keys = {k: _api_key(k) for k in providers}
+
+    units: List[Dict[str, Any]] = []
+    for item in items:
+        project = _ensure_project(base, state, item)
+        state.update(item["key"], status="generating", error=None)
+        units += _plan(spec, item, project)
+    log(f"{len(items)} project(s) to finish, {len(units)} provider call(s), concurrency {concurrency}")
+
+    failed: Dict[str, str] = {}
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch") as pool:
+        futures = {pool.submit(_run_unit, base, spec["name"], u, api_keys): u for u in units}
+        for fut in as_completed(futures):
+            u = futures[fut]
+            try:
+                saved = fut.result()
+            except Exception as e:
+                failed.setdefault(u["key"], repr(e))
+                log(f'[{u["key"]}] {u["category"]} x{u["n"]} failed: {e!r}')
+                continue
+            log(f'[{u["key"]}] {u["category"]} +{len(saved)}')
+
+    for item in items:
+        key = item["key"]
+        if key in failed:
+            state.update(key, status="failed", error=failed[key])
+            continue
+        pid = state.projects[key]["project_id"]
+        if not export:
+            state.update(key, status="generated")
+            continue
+        dst = _export(base, pid, export.get("profile", "raw"), out_dir, key)
+        state.update(key, status="exported", export=str(dst))
+        log(f"[{key}] exported {dst}")
+    return state.projects
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    ap = argparse.ArgumentParser(prog="python -m core.batch")
+    ap.add_argument("command", choices=["run", "status"])
+    ap.add_argument("spec", type=Path)
+    ap.add_argument("--concurrency", type=int, default=None, help="provider calls in flight across all projects")
+    ap.add_argument("--provider", default=None, help="override the spec's provider for every project (e.g. Stub)")
+    ap.add_argument("--out", type=Path, default=None, help="directory for the exported ZIPs")
+    args = ap.parse_args()
+
+    base = Path(__file__).resolve().parents[1]
+    try:
+        spec = load_spec(args.spec)
+    except (OSError, ValueError) as e:
+        sys.exit(f"{args.spec}: {e}")
+    if args.provider:
+        spec["provider"] = args.provider
+        for p in spec["projects"]:
+            p.pop("provider", None)
+
+    if args.command == "status":
+        projects = BatchState(base, spec["name"]).projects
+        for p in spec["projects"]:
+            s = projects.get(p["key"], {})
+            print(f'{p["key"]}: {s.get("status", "pending")} {s.get("project_id", "")} {s.get("error") or s.get("export") or ""}')
+        sys.exit(0)
+
+    final = run_batch(base, spec, concurrency=args.concurrency, out_dir=args.out)
+    sys.exit(1 if any(s.get("status") == "failed" for s in final.values()) else 0)
@@ -0,0 +1,149 @@
+# core/blobs.py
+
+"""
+Content-addressed store for asset images, shared by every project:
+data/blobs/<first two hex digits>/<sha256><ext>.
+
+An asset stored here has meta["blob"] = "<sha256><ext>"; Asset.path keeps the human-readable
+project path (assets/<category>/<file>) that exports use as the archive layout. Resolve the
+file with storage.asset_file(). Blobs are immutable: writers ingest a new file instead of
+editing one in place.
+
+Reference counts live in the catalog (blob_refs) and are bumped as assets are recorded;
+gc() recounts them from the project files before deleting anything, and keeps unreferenced
+blobs younger than GC_GRACE_SECONDS (they may belong to a save that is still in progress).
+
+    python -m core.blobs migrate [project_id ...]   # move existing asset files into the store
+    python -m core.blobs gc [--dry-run]
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, Iterator, Tuple
+import hashlib
+import os
+import shutil
+import time
+import uuid
+
+from . import catalog
+
+BLOB_DIR = "blobs"
+GC_GRACE_SECONDS = 3600
+
+
+def blobs_root(base: Path) -> Path:
+    return base / "data" / BLOB_DIR
+
+
+def blob_rel(key: str) -> Path:
+    return Path(key[:2]) / key
+
+
+def blob_path(base: Path, key: str) -> Path:
+    return blobs_root(base) / blob_rel(key)
+
+
+def _digest(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def ingest(base: Path, src: Path, move: bool = True) -> str:
+    """
+    Adds a file to the store and returns its key. With move=True the source is consumed
+    (renamed into place, or deleted if the content is already stored); otherwise it is kept
+    and the blob is a hardlink or copy of it.
+    """
+    key = _digest(src) + src.suffix.lower()
+    dst = blob_path(base, key)
+    if dst.exists():
+        # refresh the mtime so a concurrent gc() sees the blob as recently used
+        os.utime(dst)
+        if move:
+            src.unlink()
+        return key
+
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if move:
+        os.replace(src, dst)
+        return key
+    tmp = dst.with_name(f".{uuid.uuid4().hex}.tmp")
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+    return key
+
+
+def iter_blobs(base: Path) -> Iterator[Tuple[str, Path]]:
+    root = blobs_root(base)
+    if not root.exists():
+        return
+    for d in root.iterdir():
+        if d.is_dir():
+            for p in d.iterdir():
+                if not p.name.startswith("."):
+                    yield p.name, p
+
+
+def gc(base: Path, dry_run: bool = False, grace: float = GC_GRACE_SECONDS) -> Dict[str, int]:
+    """Deletes blobs no asset references. Returns {"blobs", "bytes"} removed (or removable, with dry_run)."""
+    refs = catalog.recount_blob_refs(base)
+    cutoff = time.time() - grace
+    removed, freed = 0, 0
+    for key, p in iter_blobs(base):
+        if key in refs:
+            continue
+        st = p.stat()
+        if st.st_mtime > cutoff:
+            continue
+        removed += 1
+        freed += st.st_size
+        if not dry_run:
+            p.unlink(missing_ok=True)
+    return {"blobs": removed, "bytes": freed}
+
+
+def migrate_project(base: Path, project_id: str) -> int:
+    """Moves a project's asset files into the store; returns how many assets were migrated."""
+    from .storage import load_project, project_dir, save_project
+
+    project = load_project(base, project_id)
+    pdir = project_dir(base, project_id)
+    moved = []
+    for a in project.assets:
+        src = pdir / a.path
+        if "blob" in a.meta or not src.is_file():
+            continue
+        # link first, drop the originals only once project.json points at the blobs
+        a.meta["blob"] = ingest(base, src, move=False)
+        moved.append(src)
+    if moved:
+        save_project(base, project)
+        catalog.recount_blob_refs(base)
+        for src in moved:
+            src.unlink(missing_ok=True)
+    return len(moved)
+
+
+if __name__ == "__main__":
+    import sys
+
+    args = sys.argv[1:]
+    base = Path(__file__).resolve().parents[1]
+    if args[:1] == ["migrate"]:
+        ids = args[1:] or [p.name for p in (base / "data" / "projects").iterdir() if (p / "project.json").exists()]
+        for pid in ids:
+            print(f"{pid}: {migrate_project(base, pid)} asset(s) moved into the blob store")
+    elif args[:1] == ["gc"] and set(args[1:]) <= {"--dry-run"}:
+        dry = "--dry-run" in args
+        r = gc(base, dry_run=dry)
+        print(f'{"Would remove" if dry else "Removed"} {r["blobs"]} blob(s), {r["bytes"] / 2**20:.1f} MB')
+    else:
+        sys.exit("usage: python -m core.blobs migrate [project_id ...] | gc [--dry-run]")
@@ -0,0 +1,207 @@
+# core/catalog.py
+
+"""
+Local SQLite catalog of project metadata, per-category asset counts and
+reference counts for the shared blob store (core.blobs).
+
+The project folders stay the source of truth; the catalog only exists so the
+sidebar can list projects without parsing every project.json. Rebuild it with:
+
+    python -m core.catalog rebuild
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional
+import sqlite3
+import threading
+import time
+
+from .models import Project
+
+CATALOG_FILE = "catalog.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    theme TEXT NOT NULL DEFAULT '',
+    orientation TEXT NOT NULL DEFAULT 'Landscape',
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS projects_by_created ON projects (created_at DESC);
+CREATE TABLE IF NOT EXISTS asset_counts (
+    project_id TEXT NOT NULL,
+    category TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (project_id, category)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS blob_refs (
+    key TEXT PRIMARY KEY,
+    refs INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+# sqlite3 connections can't be shared across threads and Streamlit runs each
+# session on its own thread, so keep one connection per (thread, catalog file).
+_local = threading.local()
+
+
+def catalog_path(base: Path) -> Path:
+    return base / "data" / CATALOG_FILE
+
+
+def _connect(base: Path) -> sqlite3.Connection:
+    path = catalog_path(base)
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(path)
+    if conn is not None:
+        return conn
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fresh = not path.exists()
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    conns[path] = conn
+    if fresh:
+        # first run against an existing data/ folder: index what's already there
+        rebuild(base)
+    return conn
+
+
+def upsert_project(base: Path, project: Project) -> None:
+    """Records the project's metadata and recounts its assets per category."""
+    counts = project.index().category_counts()
+
+    conn = _connect(base)
+    with conn:
+        conn.execute(
+            "INSERT INTO projects (id, title, theme, orientation, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET title=excluded.title, theme=excluded.theme, "
+            "orientation=excluded.orientation, created_at=excluded.created_at, updated_at=excluded.updated_at",
+            (project.id, project.title, project.theme, project.orientation, project.created_at, time.time()),
+        )
+        conn.execute("DELETE FROM asset_counts WHERE project_id = ?", (project.id,))
+        conn.executemany(
+            "INSERT INTO asset_counts (project_id, category, count) VALUES (?, ?, ?)",
+            [(project.id, c, n) for c, n in counts.items()],
+        )
+
+
+def bump_asset_counts(base: Path, project_id: str, categories: Iterable[str]) -> None:
+    """Increments per-category counts for newly added assets."""
+    delta: Dict[str, int] = {}
+    for c in categories:
+        delta[c] = delta.get(c, 0) + 1
+    if not delta:
+        return
+
+    conn = _connect(base)
+    with conn:
+        conn.executemany(
+            "INSERT INTO asset_counts (project_id, category, count) VALUES (?, ?, ?) "
+            "ON CONFLICT(project_id, category) DO UPDATE SET count = count + excluded.count",
+            [(project_id, c, n) for c, n in delta.items()],
+        )
+        conn.execute("UPDATE projects SET updated_at = ? WHERE id = ?", (time.time(), project_id))
+
+
+def add_blob_refs(base: Path, keys: Iterable[str], delta: int = 1) -> None:
+    counts: Dict[str, int] = {}
+    for k in keys:
+        counts[k] = counts.get(k, 0) + delta
+    if not counts:
+        return
+    conn = _connect(base)
+    with conn:
+        conn.executemany(
+            "INSERT INTO blob_refs (key, refs) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET refs = refs + excluded.refs",
+            list(counts.items()),
+        )
+        conn.execute("DELETE FROM blob_refs WHERE refs <= 0")
+
+
+def blob_refs(base: Path) -> Dict[str, int]:
+    return {k: n for k, n in _connect(base).execute("SELECT key, refs FROM blob_refs")}
+
+
+def _blob_keys(project: Project) -> Iterable[str]:
+    return (r["meta"]["blob"] for r in project.records() if "blob" in r["meta"])
+
+
+def recount_blob_refs(base: Path, projects: Optional[List[Project]] = None) -> Dict[str, int]:
+    """Recounts blob references from the project files (the source of truth) and stores them."""
+    if projects is None:
+        projects = _scan_projects(base)
+    counts: Dict[str, int] = {}
+    for proj in projects:
+        for k in _blob_keys(proj):
+            counts[k] = counts.get(k, 0) + 1
+    conn = _connect(base)
+    with conn:
+        conn.execute("DELETE FROM blob_refs")
+        conn.executemany("INSERT INTO blob_refs (key, refs) VALUES (?, ?)", list(counts.items()))
+    return counts
+
+
+def remove_project(base: Path, project_id: str) -> None:
+    conn = _connect(base)
+    with conn:
+        conn.execute("DELETE FROM asset_counts WHERE project_id = ?", (project_id,))
+        conn.execute("DELETE FROM projects WHERE id = ?", (project_id,))
+
+
+def list_projects(base: Path) -> List[Dict[str, Any]]:
+    rows = _connect(base).execute(
+        "SELECT id, title, created_at FROM projects ORDER BY created_at DESC"
+    ).fetchall()
+    return [{"id": r[0], "title": r[1], "created_at": r[2]} for r in rows]
+
+
+def asset_counts(base: Path, project_id: str) -> Dict[str, int]:
+    rows = _connect(base).execute(
+        "SELECT category, count FROM asset_counts WHERE project_id = ?", (project_id,)
+    ).fetchall()
+    return {c: n for c, n in rows}
+
+
+def rebuild(base: Path) -> int:
+    """Rescans data/projects and replaces the catalog contents. Returns the number of projects indexed."""
+    projects = _scan_projects(base)
+    conn = _connect(base)
+    with conn:
+        conn.execute("DELETE FROM asset_counts")
+        conn.execute("DELETE FROM projects")
+    for proj in projects:
+        upsert_project(base, proj)
+    recount_blob_refs(base, projects)
+    return len(projects)
+
+
+def _scan_projects(base: Path) -> List[Project]:
+    from .storage import load_project, SNAPSHOT_FILE
+
+    root = base / "data" / "projects"
+    root.mkdir(parents=True, exist_ok=True)
+    return [
+        load_project(base, p.name, lazy=True)
+        for p in root.iterdir()
+        if p.is_dir() and (p / SNAPSHOT_FILE).exists()
+    ]
+
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:] != ["rebuild"]:
+        sys.exit("usage: python -m core.catalog rebuild")
+    n = rebuild(Path(__file__).resolve().parents[1])
+    print(f"Indexed {n} project(s).")
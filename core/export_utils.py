@@ -1,12 +1,444 @@
 from __future__ import annotations
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+import hashlib
 import io
+import json
+import math
+import os
+import struct
+import tempfile
+import threading
+import time
+import uuid
 import zipfile
 
+from PIL import Image
+
+from . import metrics
+from .image_post import map_in_pool, scale_image_file
+from .storage import asset_file, blob_backed_files, load_project
+
+# Already-compressed formats gain almost nothing from DEFLATE; store them as-is.
+STORED_SUFFIXES = {".png", ".webp", ".jpg", ".jpeg", ".gif", ".zip"}
+SPOOL_MAX_BYTES = 32 * 1024 * 1024
+
+ProgressFn = Callable[[int, int], None]  # (bytes done, bytes total)
+
+
+def compress_type(path: Path) -> int:
+    return zipfile.ZIP_STORED if path.suffix.lower() in STORED_SUFFIXES else zipfile.ZIP_DEFLATED
+
+
+def export_files(project_path: Path) -> Dict[str, Path]:
+    """
+    {arcname: source file} for an export, sorted by arcname: the project folder minus derived/internal
+    entries such as .thumbs/ and temp files, plus blob-store assets under their assets/<category> paths.
+    """
+    out = {}
+    for p in project_path.rglob("*"):
+        rel = p.relative_to(project_path)
+        if any(part.startswith(".") for part in rel.parts) or p.suffix == ".tmp":
+            continue
+        if p.is_file():
+            out[rel.as_posix()] = p
+    if (project_path / "project.json").exists():
+        # project_path is <base>/data/projects/<id>
+        blob_files = blob_backed_files(project_path.parents[2], project_path.name)
+        out.update((Path(arc).as_posix(), p) for arc, p in blob_files.items() if p.is_file())
+    return dict(sorted(out.items()))
+
+
+def build_zip(project_path: Path, progress: Optional[ProgressFn] = None):
+    """
+    Streams the project into a spooled temporary file (in memory up to SPOOL_MAX_BYTES, then on
+    disk) and returns it rewound to the start; the caller closes it. Images are stored,
+    everything else is deflated.
+    """
+    files = [(arc, p, p.stat().st_size) for arc, p in export_files(project_path).items()]
+    total = sum(size for _, _, size in files)
+    done = 0
+    out = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES, suffix=".zip")
+    with zipfile.ZipFile(out, "w") as z:
+        for arc, p, size in files:
+            z.write(p, arcname=arc, compress_type=compress_type(p))
+            done += size
+            if progress:
+                progress(done, total)
+    out.seek(0)
+    return out
+
+
+def download_payload(f) -> Union[bytes, io.BufferedReader]:
+    """
+    What st.download_button accepts for a spooled archive: the bytes while it is still small,
+    otherwise a reader over the on-disk file (it does not accept SpooledTemporaryFile itself).
+    """
+    size = f.seek(0, io.SEEK_END)
+    f.seek(0)
+    if size <= SPOOL_MAX_BYTES:
+        return f.read()
+    return open(f.fileno(), "rb", closefd=False)
+
+
+@metrics.timed("zip_project")
 def zip_project(project_path: Path) -> bytes:
-    buf = io.BytesIO()
-    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as z:
-        for p in project_path.rglob("*"):
-            if p.is_file():
-                z.write(p, arcname=p.relative_to(project_path))
-    return buf.getvalue()
+    with build_zip(project_path) as f:
+        return f.read()
+
+
+# Incremental exports. Every export records a manifest (sha256, size, mtime per file) under
+# data/exports/<project id>/manifests/. The last full archive is kept as last.zip so the next
+# build can copy unchanged entries' compressed bytes instead of re-reading and recompressing.
+
+def exports_dir(base: Path, project_id: str) -> Path:
+    return base / "data" / "exports" / project_id
+
+
+# builds of one project read and replace the same last.zip/last.json
+_export_locks: Dict[Tuple[str, str], threading.Lock] = {}
+_export_locks_guard = threading.Lock()
+
+
+def _export_lock(base: Path, project_id: str) -> threading.Lock:
+    with _export_locks_guard:
+        return _export_locks.setdefault((str(base), project_id), threading.Lock())
+
+
+def _write_json(path: Path, obj: Any) -> None:
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    tmp.write_text(json.dumps(obj), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _read_last(last_zip: Path, last_json: Path) -> Tuple[Optional[str], Dict[str, Dict[str, Any]]]:
+    """(id, files) of the last full export, or (None, {}) if it is missing or unreadable."""
+    if not last_zip.exists():
+        return None, {}
+    try:
+        last = json.loads(last_json.read_text(encoding="utf-8"))
+        return last["id"], last["files"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None, {}
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def file_manifest(
+    project_path: Path,
+    previous: Optional[Dict[str, Any]] = None,
+    files: Optional[Dict[str, Path]] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """{arcname: {sha256, size, mtime_ns}}; hashes are reused from previous when size and mtime match."""
+    previous = previous or {}
+    out = {}
+    for arc, p in (files if files is not None else export_files(project_path)).items():
+        st = p.stat()
+        old = previous.get(arc)
+        if old and old["size"] == st.st_size and old["mtime_ns"] == st.st_mtime_ns:
+            digest = old["sha256"]
+        else:
+            digest = _sha256(p)
+        out[arc] = {"sha256": digest, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    return out
+
+
+def list_exports(base: Path, project_id: str) -> List[Dict[str, Any]]:
+    """Previous export records (without their file lists), newest first."""
+    records = []
+    for p in (exports_dir(base, project_id) / "manifests").glob("*.json"):
+        rec = json.loads(p.read_text(encoding="utf-8"))
+        rec["file_count"] = len(rec.pop("files"))
+        records.append(rec)
+    records.sort(key=lambda r: r["created_at"], reverse=True)
+    return records
+
+
+def _load_manifest(base: Path, project_id: str, export_id: str) -> Dict[str, Any]:
+    return json.loads((exports_dir(base, project_id) / "manifests" / f"{export_id}.json").read_text(encoding="utf-8"))
+
+
+def _copy_raw_entry(src: zipfile.ZipFile, info: zipfile.ZipInfo, dst: zipfile.ZipFile) -> None:
+    """Appends an entry's already-compressed bytes to dst without decompressing them."""
+    src.fp.seek(info.header_offset)
+    header = src.fp.read(zipfile.sizeFileHeader)
+    name_len, extra_len = struct.unpack("<HH", header[26:30])
+    src.fp.seek(info.header_offset + zipfile.sizeFileHeader + name_len + extra_len)
+
+    zi = zipfile.ZipInfo(info.filename, info.date_time)
+    zi.compress_type = info.compress_type
+    zi.CRC = info.CRC
+    zi.compress_size = info.compress_size
+    zi.file_size = info.file_size
+    zi.external_attr = info.external_attr
+    zi.flag_bits = info.flag_bits & 0x800  # keep the UTF-8 name flag; sizes go in the local header
+
+    zi.header_offset = dst.fp.tell()
+    dst.fp.write(zi.FileHeader())
+    remaining = info.compress_size
+    while remaining:
+        chunk = src.fp.read(min(remaining, 1024 * 1024))
+        dst.fp.write(chunk)
+        remaining -= len(chunk)
+    dst.filelist.append(zi)
+    dst.NameToInfo[zi.filename] = zi
+    dst.start_dir = dst.fp.tell()
+    dst._didModify = True
+
+
+def _write_entries(
+    out,
+    sources: Dict[str, Path],
+    arcnames: List[str],
+    manifest: Dict[str, Dict[str, Any]],
+    reuse: Optional[Tuple[zipfile.ZipFile, Dict[str, Dict[str, Any]]]],
+    extra: Optional[Dict[str, bytes]] = None,
+    extra_files: Optional[Dict[str, Path]] = None,
+    progress: Optional[ProgressFn] = None,
+    comment: bytes = b"",
+) -> None:
+    total = sum(manifest[a]["size"] for a in arcnames)
+    done = 0
+    with zipfile.ZipFile(out, "w") as z:
+        z.comment = comment
+        for arc in arcnames:
+            info = None
+            if reuse is not None:
+                old_zip, old_files = reuse
+                if old_files.get(arc, {}).get("sha256") == manifest[arc]["sha256"]:
+                    info = old_zip.NameToInfo.get(arc)
+            if info is not None:
+                _copy_raw_entry(reuse[0], info, z)
+            else:
+                p = sources[arc]
+                z.write(p, arcname=arc, compress_type=compress_type(p))
+            done += manifest[arc]["size"]
+            if progress:
+                progress(done, total)
+        for name, data in (extra or {}).items():
+            z.writestr(name, data, compress_type=zipfile.ZIP_DEFLATED)
+        for name, p in (extra_files or {}).items():
+            z.write(p, arcname=name, compress_type=compress_type(p))
+
+
+@metrics.timed("build_export")
+def build_export(
+    base: Path,
+    project_id: str,
+    since: Optional[str] = None,
+    progress: Optional[ProgressFn] = None,
+    profile: str = "raw",
+) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Builds a full archive (since=None) or a delta archive holding only the files added or
+    changed since the export `since` (plus delta.json listing changed and removed paths).
+    Unchanged entries are copied from the previous full archive without recompression.
+    Profiles other than "raw" add their derived files under engine/ (see EXPORT_PROFILES).
+    Returns (open binary file rewound to the start, export record); the caller closes the file.
+    """
+    with _export_lock(base, project_id):
+        return _build_export(base, project_id, since, progress, profile)
+
+
+def _build_export(
+    base: Path,
+    project_id: str,
+    since: Optional[str],
+    progress: Optional[ProgressFn],
+    profile: str,
+) -> Tuple[Any, Dict[str, Any]]:
+    project_path = base / "data" / "projects" / project_id
+    edir = exports_dir(base, project_id)
+    (edir / "manifests").mkdir(parents=True, exist_ok=True)
+    last_zip, last_json = edir / "last.zip", edir / "last.json"
+
+    last_id, last_files = _read_last(last_zip, last_json)
+    old_zip = None
+    if last_files:
+        try:
+            old_zip = zipfile.ZipFile(last_zip)
+        except (OSError, zipfile.BadZipFile):
+            last_files = {}
+    # last.zip is replaced before last.json is rewritten: a crash in between leaves a pair
+    # that doesn't match, which the archive comment (the export id) gives away
+    if old_zip is not None and old_zip.comment != last_id.encode("ascii"):
+        old_zip.close()
+        old_zip, last_files = None, {}
+    files = export_files(project_path)
+    manifest = file_manifest(project_path, previous=last_files, files=files)
+
+    record = {
+        "id": time.strftime("%Y%m%d-%H%M%S") + "-" + uuid.uuid4().hex[:6],
+        "created_at": time.time(),
+        "kind": "delta" if since else "full",
+        "since": since,
+        "profile": profile,
+        "files": manifest,
+    }
+
+    work = tempfile.TemporaryDirectory()
+    try:
+        derived = render_profile(base, project_id, EXPORT_PROFILES[profile], Path(work.name))
+        reuse = (old_zip, last_files) if old_zip else None
+        if since:
+            base_files = _load_manifest(base, project_id, since)["files"]
+            changed = [a for a, m in manifest.items() if base_files.get(a, {}).get("sha256") != m["sha256"]]
+            removed = sorted(set(base_files) - set(manifest))
+            delta = {"since": since, "export": record["id"], "changed": changed, "removed": removed}
+            out = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES, suffix=".zip")
+            _write_entries(out, files, changed, manifest, reuse,
+                           extra={"delta.json": json.dumps(delta, indent=2).encode("utf-8")},
+                           extra_files=derived, progress=progress)
+            out.seek(0)
+        else:
+            f = tempfile.NamedTemporaryFile(dir=edir, prefix=".last.", suffix=".zip.tmp", delete=False)
+            try:
+                with f:
+                    _write_entries(f, files, list(manifest), manifest, reuse, extra_files=derived,
+                                   progress=progress, comment=record["id"].encode("ascii"))
+                if old_zip:
+                    old_zip.close()
+                    old_zip = None
+                os.replace(f.name, last_zip)
+            except BaseException:
+                Path(f.name).unlink(missing_ok=True)
+                raise
+            _write_json(last_json, {"id": record["id"], "files": manifest})
+            out = open(last_zip, "rb")
+    finally:
+        if old_zip:
+            old_zip.close()
+        work.cleanup()
+
+    _write_json(edir / "manifests" / f"{record['id']}.json", record)
+    return out, record
+
+
+# Export profiles. "engine" adds engine-ready derivatives under engine/: symbols packed into
+# texture atlases with a JSON frame map, @0.5x/@1x/@2x variants of the canvas-sized layers,
+# and engine/manifest.json describing both.
+
+@dataclass(frozen=True)
+class ExportProfile:
+    name: str
+    label: str
+    atlas: bool = False
+    atlas_max: int = 2048
+    atlas_padding: int = 2
+    scales: Tuple[float, ...] = ()
+    layer_categories: Tuple[str, ...] = ("Background", "ReelBackground", "Frame")
+
+
+EXPORT_PROFILES = {
+    "raw": ExportProfile("raw", "Raw project folder"),
+    "engine": ExportProfile("engine", "Engine-ready (symbol atlas + @0.5x/@1x/@2x layers)", atlas=True, scales=(0.5, 1.0, 2.0)),
+}
+
+
+def _pow2(n: int) -> int:
+    return 1 << max(0, int(n) - 1).bit_length()
+
+
+def pack_rects(sizes: List[Tuple[int, int]], max_size: int = 2048, padding: int = 2) -> List[Tuple[Tuple[int, int], List[Tuple[int, int, int]]]]:
+    """
+    Shelf packing, first-fit by decreasing height, onto as many max_size pages as needed.
+    Page width is the smallest power of two holding the widest rect and roughly the square root
+    of the total area; heights are rounded up to a power of two.
+    Returns [((page_w, page_h), [(index, x, y), ...]), ...].
+    """
+    if not sizes:
+        return []
+    padded = [(w + padding, h + padding) for w, h in sizes]
+    if any(w > max_size or h > max_size for w, h in padded):
+        raise ValueError(f"an image does not fit a {max_size}px atlas page")
+    area = sum(w * h for w, h in padded)
+    width = min(max_size, _pow2(max(max(w for w, _ in padded), math.isqrt(area))))
+
+    pages: List[Dict[str, Any]] = []  # {"height": used, "shelves": [[y, h, x_cursor]], "rects": [...]}
+    for i in sorted(range(len(sizes)), key=lambda i: (padded[i][1], padded[i][0]), reverse=True):
+        w, h = padded[i]
+        placed = False
+        for page in pages:
+            for shelf in page["shelves"]:
+                if h <= shelf[1] and shelf[2] + w <= width:
+                    page["rects"].append((i, shelf[2], shelf[0]))
+                    shelf[2] += w
+                    placed = True
+                    break
+            if not placed and page["height"] + h <= max_size:
+                page["shelves"].append([page["height"], h, w])
+                page["rects"].append((i, 0, page["height"]))
+                page["height"] += h
+                placed = True
+            if placed:
+                break
+        if not placed:
+            pages.append({"height": h, "shelves": [[0, h, w]], "rects": [(i, 0, 0)]})
+
+    return [((width, min(max_size, _pow2(p["height"]))), p["rects"]) for p in pages]
+
+
+def render_profile(base: Path, project_id: str, profile: ExportProfile, out_dir: Path) -> Dict[str, Path]:
+    """Writes the profile's derived files into out_dir; returns {arcname: path} to add to the archive."""
+    if not profile.atlas and not profile.scales:
+        return {}
+    project = load_project(base, project_id, lazy=True)
+    pdir = base / "data" / "projects" / project_id
+    files: Dict[str, Path] = {}
+    manifest: Dict[str, Any] = {
+        "profile": profile.name,
+        "project": {"id": project.id, "title": project.title, "reels": project.reels, "rows": project.rows,
+                    "orientation": project.orientation, "canvas": (project.preview_config or {}).get("canvas")},
+        "atlases": [],
+        "layers": {},
+    }
+
+    if profile.atlas:
+        symbols = [(a, asset_file(pdir, a)) for a in project.by_category("Symbols") if asset_file(pdir, a).exists()]
+        images = []
+        for _, p in symbols:
+            with Image.open(p) as img:
+                images.append(img.convert("RGBA"))
+        pad = profile.atlas_padding
+        for n, (size, rects) in enumerate(pack_rects([im.size for im in images], profile.atlas_max, pad)):
+            sheet = Image.new("RGBA", size, (0, 0, 0, 0))
+            frames = {}
+            for i, x, y in rects:
+                im = images[i]
+                sheet.paste(im, (x + pad // 2, y + pad // 2))
+                frames[Path(symbols[i][0].name).stem] = {
+                    "frame": {"x": x + pad // 2, "y": y + pad // 2, "w": im.width, "h": im.height},
+                    "sourceSize": {"w": im.width, "h": im.height},
+                }
+            stem = f"symbols-{n}"
+            sheet.save(out_dir / f"{stem}.png", "PNG")
+            meta = {"frames": frames, "meta": {"image": f"{stem}.png", "size": {"w": size[0], "h": size[1]}, "scale": "1"}}
+            (out_dir / f"{stem}.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+            files[f"engine/atlas/{stem}.png"] = out_dir / f"{stem}.png"
+            files[f"engine/atlas/{stem}.json"] = out_dir / f"{stem}.json"
+            manifest["atlases"].append({"image": f"atlas/{stem}.png", "frames": f"atlas/{stem}.json", "count": len(rects)})
+
+    if profile.scales:
+        jobs = []
+        for cat in profile.layer_categories:
+            a = next((a for a in project.by_category(cat) if asset_file(pdir, a).exists()), None)
+            if a is None:
+                continue
+            for scale in profile.scales:
+                suffix = f"@{scale:g}x"
+                dst = out_dir / f"{cat}{suffix}.png"
+                jobs.append((str(asset_file(pdir, a)), str(dst), scale))
+                files[f"engine/layers/{cat}{suffix}.png"] = dst
+                manifest["layers"].setdefault(cat, {})[suffix] = f"layers/{cat}{suffix}.png"
+        map_in_pool(scale_image_file, jobs)
+
+    (out_dir / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    files["engine/manifest.json"] = out_dir / "manifest.json"
+    return files
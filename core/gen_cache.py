@@ -0,0 +1,175 @@
+# core/gen_cache.py
+
+"""
+Content-addressed cache of provider generations.
+
+Entries live under data/cache/generations/<key[:2]>/<key>/ with the provider's
+original image bytes plus meta.json. The key is a hash of the normalized request, so pressing
+Generate again with identical settings is served from disk without an API call.
+"""
+
+from __future__ import annotations
+
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+
+from . import metrics
+from .providers import ImageProvider, GenResult, PRIORITY_INTERACTIVE, generate_fanout, sniff_format
+
+GEN_CACHE_BUDGET_BYTES = 2 * 1024 ** 3
+_PAYLOAD_KEYS = ("b64_json", "image_bytes")
+
+
+def _normalize_prompt(prompt: str) -> str:
+    lines = prompt.replace("\r\n", "\n").strip().split("\n")
+    return "\n".join(line.rstrip() for line in lines)
+
+
+def request_key(provider: str, model: str, prompt: str, size: str, n: int, transparent: bool) -> str:
+    req = {
+        "provider": provider,
+        "model": model,
+        "prompt": _normalize_prompt(prompt),
+        "size": size,
+        "n": int(n),
+        "transparent": bool(transparent),
+    }
+    return hashlib.sha256(json.dumps(req, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _scrub(obj: Any) -> Any:
+    """Drops image payloads from response metadata; the images are stored separately."""
+    if isinstance(obj, dict):
+        return {k: _scrub(v) for k, v in obj.items() if k not in _PAYLOAD_KEYS}
+    if isinstance(obj, list):
+        return [_scrub(v) for v in obj]
+    return obj
+
+
+def _encoded(res: GenResult) -> List[bytes]:
+    if res.encoded:
+        return res.encoded
+    out = []
+    for img in res.images:
+        buf = BytesIO()
+        img.save(buf, "PNG")
+        out.append(buf.getvalue())
+    return out
+
+
+class GenerationCache:
+    def __init__(self, root: Path, budget_bytes: int = GEN_CACHE_BUDGET_BYTES):
+        self.root = root
+        self.budget_bytes = budget_bytes
+        self._lock = threading.Lock()
+
+    def _entry(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def get(self, key: str) -> Optional[GenResult]:
+        entry = self._entry(key)
+        try:
+            meta = json.loads((entry / "meta.json").read_text(encoding="utf-8"))
+            encoded = [(entry / fn).read_bytes() for fn in meta["files"]]
+            os.utime(entry)  # LRU: entry mtime is the last-use time
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            # missing, half-written or evicted mid-read: a plain miss
+            return None
+        return GenResult(raw={**meta["raw"], "cache": "hit"}, encoded=encoded)
+
+    def put(self, key: str, res: GenResult) -> None:
+        entry = self._entry(key)
+        tmp = entry.parent / f".{key}.{uuid.uuid4().hex}.tmp"
+        tmp.mkdir(parents=True)
+        files = []
+        for i, data in enumerate(_encoded(res)):
+            fn = f"{i}.{(sniff_format(data) or 'bin').lower()}"
+            (tmp / fn).write_bytes(data)
+            files.append(fn)
+        meta = {"created_at": time.time(), "files": files, "raw": _scrub(res.raw)}
+        (tmp / "meta.json").write_text(json.dumps(meta, default=str), encoding="utf-8")
+        try:
+            os.rename(tmp, entry)
+        except OSError:
+            # another session stored the same request first
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict()
+
+    def discard(self, key: str) -> None:
+        shutil.rmtree(self._entry(key), ignore_errors=True)
+
+    def evict(self) -> None:
+        """Drops least recently used entries until the cache fits its byte budget."""
+        with self._lock:
+            entries = []
+            total = 0
+            for shard in self.root.glob("??"):
+                for entry in shard.iterdir():
+                    if entry.name.startswith("."):
+                        continue
+                    try:
+                        size = sum(f.stat().st_size for f in entry.iterdir())
+                        entries.append((entry.stat().st_mtime, size, entry))
+                    except FileNotFoundError:
+                        continue
+                    total += size
+            entries.sort()
+            for _, size, entry in entries:
+                if total <= self.budget_bytes:
+                    break
+                shutil.rmtree(entry, ignore_errors=True)
+                total -= size
+
+
+_caches: Dict[str, GenerationCache] = {}
+
+
+def gen_cache(base: Path) -> GenerationCache:
+    root = base / "data" / "cache" / "generations"
+    return _caches.setdefault(str(root), GenerationCache(root))
+
+
+def cached_generate(
+    base: Path,
+    provider: ImageProvider,
+    api_key: str,
+    model: str,
+    prompt: str,
+    size: str,
+    n: int = 1,
+    transparent: bool = False,
+    force_fresh: bool = False,
+    priority: int = PRIORITY_INTERACTIVE,
+    session: Optional[str] = None,
+) -> GenResult:
+    """
+    generate_fanout behind the generation cache. force_fresh skips the lookup
+    (the fresh result still replaces the cached one). priority/session go to the provider governor.
+    """
+    cache = gen_cache(base)
+    key = request_key(provider.name, model, prompt, size, n, transparent)
+    if not force_fresh:
+        hit = cache.get(key)
+        if hit is not None:
+            metrics.incr("gen_cache_hits", provider=provider.name, model=model)
+            return hit
+    metrics.incr("gen_cache_misses", provider=provider.name, model=model)
+
+    with metrics.timer("generate", provider=provider.name, model=model):
+        res = generate_fanout(
+            provider, api_key=api_key, model=model, prompt=prompt, size=size, n=n, transparent=transparent,
+            priority=priority, session=session,
+        )
+    if res.count and not res.raw.get("errors"):
+        if force_fresh:
+            cache.discard(key)
+        cache.put(key, res)
+    return res
@@ -0,0 +1,83 @@
+# core/image_cache.py
+
+"""
+Process-wide LRU of decoded images shared by every page and session.
+
+Entries are keyed by (path, mtime, mode), so a rewritten file is decoded again.
+Cached images are shared: treat them as read-only (convert/copy before drawing).
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+import threading
+
+from PIL import Image
+
+IMAGE_CACHE_BUDGET_BYTES = 512 * 1024 * 1024
+
+
+def _nbytes(img: Image.Image) -> int:
+    return img.width * img.height * len(img.getbands())
+
+
+class ImageCache:
+    def __init__(self, budget_bytes: int = IMAGE_CACHE_BUDGET_BYTES):
+        self.budget_bytes = budget_bytes
+        self.hits = 0
+        self.misses = 0
+        self._bytes = 0
+        self._entries: "OrderedDict[Tuple[str, int, Optional[str]], Image.Image]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: Union[str, Path], mode: Optional[str] = "RGBA") -> Image.Image:
+        """Decoded image at path (converted to mode unless mode is None). Raises FileNotFoundError."""
+        p = str(path)
+        key = (p, Path(p).stat().st_mtime_ns, mode)
+        with self._lock:
+            img = self._entries.get(key)
+            if img is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return img
+            self.misses += 1
+
+        # decode outside the lock; a concurrent miss on the same file just decodes twice
+        with Image.open(p) as src:
+            img = src.convert(mode) if mode else src.copy()
+        size = _nbytes(img)
+        if size > self.budget_bytes:
+            return img
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = img
+                self._bytes += size
+            while self._bytes > self.budget_bytes and self._entries:
+                _, old = self._entries.popitem(last=False)
+                self._bytes -= _nbytes(old)
+        return img
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "budget_bytes": self.budget_bytes,
+            }
+
+
+IMAGE_CACHE = ImageCache()
+
+
+def open_image(path: Union[str, Path], mode: Optional[str] = "RGBA") -> Image.Image:
+    return IMAGE_CACHE.get(path, mode)
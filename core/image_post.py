@@ -1,7 +1,22 @@
 # core/image_post.py
 
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from io import BytesIO
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+import multiprocessing
+import os
+import threading
+import time
+
 from PIL import Image
 
+from . import metrics
+
 
 def to_canvas(img: Image.Image, target_w: int, target_h: int, mode: str = "cover") -> Image.Image:
     """
@@ -59,3 +74,143 @@ def to_exact_symbol_size(img: Image.Image, w: int = 158, h: int = 178) -> Image.
     y = (h - nh) // 2
     canvas.alpha_composite(resized, (x, y))
     return canvas
+
+
+CANVAS_CONTAIN_CATEGORIES = ["ReelBackground", "Frame", "UI", "Splashes", "BonusGames", "FreeSpins", "Characters"]
+
+
+def needs_postprocess(category: str) -> bool:
+    return category in ["Background", "Mockups", "Symbols"] or category in CANVAS_CONTAIN_CATEGORIES
+
+
+def postprocess_for_category(img: Image.Image, category: str, canvas_w: int, canvas_h: int) -> Image.Image:
+    """
+    Normalizes provider output for the given asset category:
+    backgrounds/mockups cover the canvas, layered art is contained, symbols get the exact symbol size.
+    """
+    if category in ["Background", "Mockups"]:
+        return to_canvas(img, canvas_w, canvas_h, mode="cover")
+    if category in CANVAS_CONTAIN_CATEGORIES:
+        return to_canvas(img, canvas_w, canvas_h, mode="contain")
+    if category == "Symbols":
+        return to_exact_symbol_size(img, 158, 178)
+    # UploadedAssets or unknown: keep as-is
+    return img.convert("RGBA")
+
+
+@dataclass
+class PostJob:
+    """
+    One post-process + PNG write, cheap to pickle: `data` is the encoded image as returned by
+    the provider, or raw pixels when `raw_mode`/`raw_size` are set.
+    """
+    data: bytes
+    category: str
+    canvas_w: int
+    canvas_h: int
+    out_path: str
+    raw_mode: Optional[str] = None
+    raw_size: Optional[Tuple[int, int]] = None
+
+    @staticmethod
+    def from_image(img: Image.Image, category: str, canvas_w: int, canvas_h: int, out_path: str) -> "PostJob":
+        img = img.convert("RGBA")
+        return PostJob(img.tobytes(), category, canvas_w, canvas_h, out_path, raw_mode="RGBA", raw_size=img.size)
+
+    def decode(self) -> Image.Image:
+        if self.raw_mode:
+            return Image.frombuffer(self.raw_mode, self.raw_size, self.data, "raw", self.raw_mode, 0, 1)
+        return Image.open(BytesIO(self.data))
+
+
+def run_post_job(job: PostJob, timings: Optional[Dict[str, float]] = None) -> str:
+    """
+    Decode, resize for the category, write the PNG and its thumbnails; runs inside a pool worker.
+    Per-step seconds go into `timings` when given.
+    """
+    from .thumbs import write_thumbnails
+
+    clock = time.perf_counter
+    t0 = clock()
+    img = job.decode()
+    img.load()
+    t1 = clock()
+    out = postprocess_for_category(img, job.category, job.canvas_w, job.canvas_h)
+    t2 = clock()
+    out.save(job.out_path, "PNG")
+    t3 = clock()
+    write_thumbnails(out, Path(job.out_path))
+    if timings is not None:
+        timings.update(decode=t1 - t0, resize=t2 - t1, png_encode=t3 - t2, thumbnails=clock() - t3)
+    return job.out_path
+
+
+def _run_post_job_timed(job: PostJob) -> Tuple[str, Dict[str, float]]:
+    # worker processes keep their own (disabled) registry, so timings travel back with the result
+    timings: Dict[str, float] = {}
+    return run_post_job(job, timings), timings
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+POST_MAX_WORKERS = max(1, min(8, (os.cpu_count() or 1)))
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking the threaded Streamlit server is unsafe
+            _pool = ProcessPoolExecutor(max_workers=POST_MAX_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _reset_pool() -> None:
+    global _pool
+    with _pool_lock:
+        _pool = None
+
+
+def map_in_pool(fn: Callable[[T], R], items: List[T]) -> List[R]:
+    """
+    Maps a module-level function over items on the shared process pool, preserving order.
+    Single items and single-core hosts run in-process; a broken pool falls back to serial.
+    """
+    if len(items) <= 1 or POST_MAX_WORKERS <= 1:
+        return [fn(i) for i in items]
+    try:
+        return list(_get_pool().map(fn, items))
+    except BrokenProcessPool:
+        _reset_pool()
+        return [fn(i) for i in items]
+
+
+def postprocess_batch(jobs: List[PostJob]) -> List[str]:
+    """
+    Runs post-processing jobs across cores (resize, PNG encode and file write all happen in the
+    worker) and returns the written paths in job order.
+    """
+    if not metrics.enabled():
+        return map_in_pool(run_post_job, jobs)
+    with metrics.timer("postprocess_batch"):
+        results = map_in_pool(_run_post_job_timed, jobs)
+    for job, (_, timings) in zip(jobs, results):
+        for step, seconds in timings.items():
+            metrics.observe(f"post_{step}", seconds, category=job.category)
+    return [path for path, _ in results]
+
+
+def scale_image_file(job: Tuple[str, str, float]) -> str:
+    """(src, dst, scale): writes a LANCZOS-rescaled PNG copy of src; runs inside a pool worker."""
+    src, dst, scale = job
+    with Image.open(src) as img:
+        img = img.convert("RGBA")
+        size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+        if size != img.size:
+            img = img.resize(size, Image.Resampling.LANCZOS)
+        img.save(dst, "PNG")
+    return dst
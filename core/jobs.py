@@ -0,0 +1,256 @@
+# core/jobs.py
+
+"""
+Background generation jobs.
+
+Jobs run on a process-wide worker pool, so they keep going across Streamlit
+reruns and page switches; pages only submit jobs and poll their records.
+Each record is persisted to data/jobs/<id>.json. API keys are held in memory
+only, which is why jobs still queued or running when the process exits are
+marked "interrupted" on the next start instead of being resumed.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict, field, replace
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional, Tuple
+import json
+import os
+import threading
+import time
+import uuid
+
+from .storage import load_project
+from .providers import PROVIDERS
+from .gen_cache import cached_generate
+from .pipeline import canvas_size, save_result, extract_stages, run_extract
+
+JOB_WORKERS = 4
+JOB_HISTORY = 200
+
+ACTIVE = ("queued", "running")
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str  # "generate" | "extract"
+    project_id: str
+    params: Dict[str, Any]
+    status: str = "queued"  # queued | running | done | failed | interrupted
+    progress: float = 0.0
+    message: str = ""
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result_paths: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+    @property
+    def active(self) -> bool:
+        return self.status in ACTIVE
+
+
+class JobManager:
+    def __init__(self, base: Path, max_workers: int = JOB_WORKERS):
+        self.base = base
+        self.root = base / "data" / "jobs"
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Job] = {}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._load()
+
+    def _load(self) -> None:
+        records = []
+        for p in self.root.glob("*.json"):
+            try:
+                records.append(Job(**json.loads(p.read_text(encoding="utf-8"))))
+            except (json.JSONDecodeError, TypeError):
+                continue
+        records.sort(key=lambda j: j.created_at, reverse=True)
+        for job in records[JOB_HISTORY:]:
+            (self.root / f"{job.id}.json").unlink(missing_ok=True)
+        for job in records[:JOB_HISTORY]:
+            if job.active:
+                job.status = "interrupted"
+                job.message = "Server restarted before the job finished."
+                self._persist(job)
+            self._jobs[job.id] = job
+
+    def _prune_locked(self) -> None:
+        """Forgets the oldest finished jobs (memory and disk) beyond JOB_HISTORY; caller holds _lock."""
+        excess = len(self._jobs) - JOB_HISTORY
+        if excess <= 0:
+            return
+        finished = sorted((j for j in self._jobs.values() if not j.active), key=lambda j: j.created_at)
+        for job in finished[:excess]:
+            del self._jobs[job.id]
+            (self.root / f"{job.id}.json").unlink(missing_ok=True)
+
+    def _persist(self, job: Job) -> None:
+        tmp = self.root / f".{job.id}.tmp"
+        tmp.write_text(json.dumps(asdict(job), ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.root / f"{job.id}.json")
+
+    def _update(self, job_id: str, **changes: Any) -> None:
+        with self._lock:
+            job = self._jobs[job_id]
+            for k, v in changes.items():
+                setattr(job, k, v)
+            self._persist(job)
+            if not job.active:
+                self._prune_locked()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return replace(job) if job else None
+
+    def list(self, project_id: Optional[str] = None, kind: Optional[str] = None) -> List[Job]:
+        """Snapshots of job records, newest first."""
+        with self._lock:
+            jobs = [
+                replace(j) for j in self._jobs.values()
+                if (project_id is None or j.project_id == project_id) and (kind is None or j.kind == kind)
+            ]
+        jobs.sort(key=lambda j: j.created_at, reverse=True)
+        return jobs
+
+    def _submit(self, kind: str, project_id: str, api_key: str, params: Dict[str, Any]) -> Job:
+        job = Job(id=str(uuid.uuid4()), kind=kind, project_id=project_id, params=params)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._persist(job)
+            self._prune_locked()
+        self._pool.submit(self._run, job.id, api_key)
+        return replace(job)
+
+    def submit_generate(
+        self,
+        project_id: str,
+        provider_key: str,
+        api_key: str,
+        model: str,
+        prompt: str,
+        category: str,
+        name: str,
+        size: str,
+        n: int = 1,
+        transparent: bool = False,
+        force_fresh: bool = False,
+        session: Optional[str] = None,
+    ) -> Job:
+        params = {
+            "provider_key": provider_key, "model": model, "prompt": prompt, "category": category,
+            "name": name, "size": size, "n": int(n), "transparent": bool(transparent), "force_fresh": bool(force_fresh),
+            "session": session,
+        }
+        return self._submit("generate", project_id, api_key, params)
+
+    def submit_extract(
+        self,
+        project_id: str,
+        provider_key: str,
+        api_key: str,
+        model: str,
+        size: str,
+        symbols_count: int,
+        transparent: bool = False,
+        force_fresh: bool = False,
+        session: Optional[str] = None,
+    ) -> Job:
+        params = {
+            "provider_key": provider_key, "model": model, "size": size, "symbols_count": int(symbols_count),
+            "transparent": bool(transparent), "force_fresh": bool(force_fresh), "session": session,
+        }
+        return self._submit("extract", project_id, api_key, params)
+
+    def _run(self, job_id: str, api_key: str) -> None:
+        job = self.get(job_id)
+        self._update(job_id, status="running", started_at=time.time(), message="Running")
+        try:
+            paths, requested, problems = _RUNNERS[job.kind](self.base, job, api_key, lambda p, m: self._update(job_id, progress=p, message=m))
+        except Exception as e:
+            self._update(job_id, status="failed", finished_at=time.time(), error=repr(e), message="Failed")
+            return
+        # a fan-out can lose chunks and still succeed: surface the shortfall instead of "done"
+        message = f"Saved {len(paths)} image(s)" if len(paths) >= requested else f"Partial: saved {len(paths)}/{requested} image(s)"
+        self._update(
+            job_id, status="done", progress=1.0, finished_at=time.time(), result_paths=paths, message=message,
+            error="; ".join(problems) or None,
+        )
+
+
+# runners return (saved paths, images requested, problems behind any shortfall)
+_RunResult = Tuple[List[str], int, List[str]]
+
+
+def _run_generate(base: Path, job: Job, api_key: str, report: Callable[[float, str], None]) -> _RunResult:
+    p = job.params
+    project = load_project(base, job.project_id, lazy=True)
+    tw, th = canvas_size(project)
+    report(0.1, "Generating")
+    res = cached_generate(
+        base,
+        PROVIDERS[p["provider_key"]],
+        api_key=api_key,
+        model=p["model"],
+        prompt=p["prompt"],
+        n=p["n"],
+        size=p["size"],
+        transparent=p["transparent"],
+        force_fresh=p["force_fresh"],
+        session=p.get("session"),
+    )
+    report(0.8, "Loaded from cache, saving" if res.raw.get("cache") == "hit" else "Saving")
+    paths = save_result(
+        base, project, p["category"], p["name"], p["prompt"], res, p["provider_key"], p["model"],
+        meta={"size": p["size"], "n": p["n"], "canvas": f"{tw}x{th}", "orientation": project.orientation},
+    )
+    return paths, int(p["n"]), list(res.raw.get("errors") or [])
+
+
+def _run_extract(base: Path, job: Job, api_key: str, report: Callable[[float, str], None]) -> _RunResult:
+    p = job.params
+    project = load_project(base, job.project_id, lazy=True)
+    stages = extract_stages(project, p["symbols_count"], p["transparent"])
+    settled: List[str] = []
+    short: List[str] = []
+
+    def _on_progress(stage, state, detail):
+        if state == "started":
+            return
+        mark = "✗"
+        if state == "saved":
+            mark = "✓" if len(detail) >= stage.n else "⚠"
+            if len(detail) < stage.n:
+                short.append(f"{stage.category}: {len(detail)}/{stage.n}")
+        settled.append(f"{stage.category} {mark}")
+        report(len(settled) / len(stages) * 0.99, ", ".join(settled))
+
+    report(0.01, f"Generating {len(stages)} stages")
+    paths = run_extract(
+        base, project, PROVIDERS[p["provider_key"]], p["provider_key"], api_key, p["model"], p["size"], stages,
+        on_progress=_on_progress,
+        force_fresh=p["force_fresh"],
+        session=p.get("session"),
+    )
+    return paths, sum(s.n for s in stages), short
+
+
+_RUNNERS = {"generate": _run_generate, "extract": _run_extract}
+
+_managers: Dict[str, JobManager] = {}
+_managers_lock = threading.Lock()
+
+
+def job_manager(base: Path) -> JobManager:
+    """The process-wide JobManager for this data folder."""
+    with _managers_lock:
+        mgr = _managers.get(str(base))
+        if mgr is None:
+            mgr = _managers[str(base)] = JobManager(base)
+        return mgr
@@ -0,0 +1,241 @@
+# core/maintenance.py
+
+"""
+Reconciles a project's records with what is on disk, in one pass over the asset list and
+the assets/ folder:
+
+- orphans: files under assets/ (and stray *.tmp files) that no record points at, e.g. from
+  an interrupted save. Files younger than GC_GRACE_SECONDS are left alone.
+- dangling: records whose image file is missing.
+- expired: records beyond a retention policy (keep the newest N per category).
+
+plan_project() only reports; collect_project() applies that reviewed plan: it drops the
+dangling/expired records it lists (writing a fresh, compacted project.json) and moves the
+freed files to
+data/quarantine/<project id>/<timestamp>/, or deletes them with quarantine=False.
+Blobs are only released once no other record references them.
+
+    python -m core.maintenance gc [project_id ...] [--keep-last N] [--apply] [--delete]
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+import os
+import shutil
+import time
+
+from . import catalog
+from .blobs import GC_GRACE_SECONDS, blob_path
+from .models import Asset
+from .storage import (
+    JOURNAL_FILE, asset_file, compact_project, load_project, project_dir, remove_assets, _write_lock,
+)
+from .thumbs import thumb_meta
+
+QUARANTINE_DIR = "quarantine"
+
+
+@dataclass
+class GCPlan:
+    project_id: str
+    keep_last: Optional[int] = None
+    orphans: List[str] = field(default_factory=list)   # project-relative files with no record
+    dangling: List[str] = field(default_factory=list)  # asset ids whose file is missing
+    expired: List[str] = field(default_factory=list)   # asset ids past the retention policy
+    files: List[str] = field(default_factory=list)     # project files freed by dropping those records
+    blobs: List[str] = field(default_factory=list)     # blob keys nothing else references
+    reclaim_bytes: int = 0
+    kept: int = 0
+
+    def is_empty(self) -> bool:
+        return not (self.orphans or self.dangling or self.expired or self.files or self.blobs)
+
+    def summary(self) -> str:
+        return (
+            f"{len(self.orphans)} orphan file(s), {len(self.dangling)} dangling and {len(self.expired)} expired "
+            f"record(s), {self.reclaim_bytes / 2**20:.1f} MB reclaimable; {self.kept} asset(s) kept"
+        )
+
+
+def quarantine_root(base: Path) -> Path:
+    return base / "data" / QUARANTINE_DIR
+
+
+def _size(p: Path) -> int:
+    try:
+        return p.stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
+def plan_project(
+    base: Path,
+    project_id: str,
+    keep_last: Optional[int] = None,
+    grace: float = GC_GRACE_SECONDS,
+) -> GCPlan:
+    """Works out what collect_project() would remove, without touching anything."""
+    project = load_project(base, project_id, lazy=True)
+    pdir = project_dir(base, project_id)
+    plan = GCPlan(project_id, keep_last)
+
+    referenced: Set[Path] = set()
+    candidates: Set[Path] = set()
+    released: Dict[str, int] = {}
+    per_cat: Dict[str, int] = {}
+    for r in project.records():  # newest first
+        a = Asset(**r)
+        per_cat[a.category] = n = per_cat.get(a.category, 0) + 1
+        owned = [Path(a.path), *map(Path, thumb_meta(a.path).values())]
+        if keep_last is not None and n > keep_last:
+            plan.expired.append(a.id)
+        elif not asset_file(pdir, a).is_file():
+            plan.dangling.append(a.id)
+        else:
+            plan.kept += 1
+            referenced.update(owned)
+            continue
+        candidates.update(owned)
+        key = a.meta.get("blob")
+        if key:
+            released[key] = released.get(key, 0) + 1
+
+    # a removed record can share its path with a kept one (same file name generated twice)
+    for rel in sorted(candidates - referenced):
+        if (pdir / rel).is_file():
+            plan.files.append(str(rel))
+            plan.reclaim_bytes += _size(pdir / rel)
+
+    refs = catalog.blob_refs(base)
+    for key, n in released.items():
+        p = blob_path(base, key)
+        if refs.get(key, 0) <= n and p.is_file():
+            plan.blobs.append(key)
+            plan.reclaim_bytes += _size(p)
+
+    cutoff = time.time() - grace
+    stray = [pdir / f for f in os.listdir(pdir) if f.endswith(".tmp")] if pdir.is_dir() else []
+    for root, _, files in os.walk(pdir / "assets"):
+        stray.extend(Path(root) / f for f in files)
+    for p in stray:
+        rel = p.relative_to(pdir)
+        if rel in referenced or rel in candidates:
+            continue
+        try:
+            st = p.stat()
+        except FileNotFoundError:
+            continue
+        if st.st_mtime <= cutoff:
+            plan.orphans.append(str(rel))
+            plan.reclaim_bytes += st.st_size
+    plan.orphans.sort()
+    return plan
+
+
+def _dispose(src: Path, dest: Optional[Path]) -> int:
+    size = _size(src)
+    if dest is None:
+        src.unlink(missing_ok=True)
+    elif src.exists():
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        shutil.move(str(src), str(dest))
+    return size
+
+
+def collect_project(
+    base: Path,
+    plan: GCPlan,
+    quarantine: bool = True,
+    grace: float = GC_GRACE_SECONDS,
+) -> GCPlan:
+    """
+    Applies a reviewed plan_project() result: drops the dangling/expired records it lists,
+    then quarantines (or deletes) the files it lists. Only what still qualifies is touched;
+    anything that appeared after the scan (e.g. a new asset pushing older ones past
+    keep_last) waits for the next scan. Returns what was applied; reclaim_bytes is what
+    actually left the project and blob store.
+    """
+    project_id = plan.project_id
+    pdir = project_dir(base, project_id)
+    qdir = quarantine_root(base) / project_id / time.strftime("%Y%m%d-%H%M%S") if quarantine else None
+    done = GCPlan(project_id, plan.keep_last)
+    with _write_lock(base, project_id):
+        project = load_project(base, project_id, lazy=True)
+        dangling, expired = set(plan.dangling), set(plan.expired)
+        per_cat: Dict[str, int] = {}
+        drop = set()
+        for r in project.records():  # newest first
+            per_cat[r["category"]] = n = per_cat.get(r["category"], 0) + 1
+            if r["id"] in expired and plan.keep_last is not None and n > plan.keep_last:
+                done.expired.append(r["id"])
+            elif r["id"] in dangling and not asset_file(pdir, Asset(**r)).is_file():
+                done.dangling.append(r["id"])
+            else:
+                continue
+            drop.add(r["id"])
+        removed = remove_assets(base, project, drop)
+        if not removed and (pdir / JOURNAL_FILE).exists():
+            compact_project(base, project_id)
+
+        referenced: Set[Path] = set()
+        for r in project.records():
+            referenced.add(Path(r["path"]))
+            referenced.update(map(Path, thumb_meta(r["path"]).values()))
+
+        freed = 0
+        cutoff = time.time() - grace
+        orphans = set(plan.orphans)
+        for rel in plan.files + plan.orphans:
+            p = pdir / rel
+            if Path(rel) in referenced or not p.is_file():
+                continue
+            if rel in orphans and p.stat().st_mtime > cutoff:
+                continue
+            freed += _dispose(p, qdir / rel if qdir else None)
+            (done.orphans if rel in orphans else done.files).append(rel)
+
+        # re-check: another project may have recorded the same content meanwhile
+        refs = catalog.blob_refs(base)
+        paths = {r["meta"]["blob"]: r["path"] for r in removed if "blob" in r["meta"]}
+        for key in plan.blobs:
+            p = blob_path(base, key)
+            if key in refs or not p.is_file() or p.stat().st_mtime > cutoff:
+                continue
+            # quarantined under the asset's readable path, so it can be put back by hand
+            freed += _dispose(p, qdir / paths.get(key, key) if qdir else None)
+            done.blobs.append(key)
+    done.kept = len(project.assets)
+    done.reclaim_bytes = freed
+    return done
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    ap = argparse.ArgumentParser(prog="python -m core.maintenance")
+    ap.add_argument("command", choices=["gc"])
+    ap.add_argument("project_ids", nargs="*", help="default: every project")
+    ap.add_argument("--keep-last", type=int, default=None, help="keep only the newest N assets per category")
+    ap.add_argument("--apply", action="store_true", help="remove what the report lists (default: report only)")
+    ap.add_argument("--delete", action="store_true", help="with --apply, delete instead of quarantining")
+    ap.add_argument("--json", action="store_true", help="print the full plans as JSON")
+    args = ap.parse_args()
+
+    base = Path(__file__).resolve().parents[1]
+    ids = args.project_ids or [p["id"] for p in catalog.list_projects(base)]
+    plans = [
+        collect_project(base, plan_project(base, pid, keep_last=args.keep_last), quarantine=not args.delete)
+        if args.apply else plan_project(base, pid, keep_last=args.keep_last)
+        for pid in ids
+    ]
+    if args.json:
+        print(json.dumps([asdict(p) for p in plans], indent=2))
+    else:
+        for p in plans:
+            print(f"{p.project_id}: {p.summary()}")
+        total = sum(p.reclaim_bytes for p in plans)
+        print(f'{"Reclaimed" if args.apply else "Reclaimable"}: {total / 2**20:.1f} MB')
@@ -0,0 +1,202 @@
+# core/metrics.py
+
+"""
+Lightweight per-stage timings and counters.
+
+Off by default (enable with SLOT_METRICS=1 or metrics.enable()); while off, timer()
+returns a shared no-op context manager, so instrumented code pays one flag check.
+
+    with metrics.timer("provider_generate", provider="OpenAI", model="gpt-image-1"):
+        ...
+    metrics.incr("gen_cache_hits")
+
+Each (stage, labels) series keeps a cumulative histogram (for Prometheus) plus a rolling
+window of recent samples for percentiles. Timings recorded inside process-pool workers stay
+in the worker; the parent records the whole batch instead.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Tuple, TypeVar
+import functools
+import os
+import threading
+import time
+
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+ROLLING_WINDOW = 512
+
+_enabled = os.environ.get("SLOT_METRICS", "") not in ("", "0")
+_lock = threading.Lock()
+_NOOP = nullcontext()
+
+Labels = Tuple[Tuple[str, str], ...]
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class _Series:
+    __slots__ = ("count", "total", "buckets", "recent")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.buckets = [0] * len(BUCKETS)
+        self.recent: Deque[float] = deque(maxlen=ROLLING_WINDOW)
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        for i, le in enumerate(BUCKETS):
+            if seconds <= le:
+                self.buckets[i] += 1
+        self.recent.append(seconds)
+
+
+_series: Dict[Tuple[str, Labels], _Series] = {}
+_counters: Dict[Tuple[str, Labels], float] = {}
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def enable(on: bool = True) -> None:
+    global _enabled
+    _enabled = on
+
+
+def reset() -> None:
+    with _lock:
+        _series.clear()
+        _counters.clear()
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def observe(stage: str, seconds: float, **labels: Any) -> None:
+    if not _enabled:
+        return
+    key = (stage, _labels(labels))
+    with _lock:
+        s = _series.get(key)
+        if s is None:
+            s = _series[key] = _Series()
+        s.add(seconds)
+
+
+def incr(name: str, value: float = 1, **labels: Any) -> None:
+    if not _enabled:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+class _Timer:
+    __slots__ = ("stage", "labels", "start")
+
+    def __init__(self, stage: str, labels: Dict[str, Any]):
+        self.stage = stage
+        self.labels = labels
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        observe(self.stage, time.perf_counter() - self.start, **self.labels)
+
+
+def timer(stage: str, **labels: Any):
+    return _Timer(stage, labels) if _enabled else _NOOP
+
+
+def timed(stage: str) -> Callable[[F], F]:
+    """Decorator form of timer() without labels."""
+    def deco(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Timer(stage, {}):
+                return fn(*args, **kwargs)
+        return wrapper  # type: ignore[return-value]
+    return deco
+
+
+def _pct(sorted_samples: List[float], q: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    return sorted_samples[min(len(sorted_samples) - 1, int(q * len(sorted_samples)))]
+
+
+def snapshot() -> Dict[str, List[Dict[str, Any]]]:
+    """{"timings": [...], "counters": [...]} with rolling-window percentiles in milliseconds."""
+    with _lock:
+        series = [(k, s.count, s.total, sorted(s.recent)) for k, s in _series.items()]
+        counters = list(_counters.items())
+    timings = [
+        {
+            "stage": stage,
+            **dict(labels),
+            "count": count,
+            "mean_ms": total / count * 1000 if count else 0.0,
+            "p50_ms": _pct(recent, 0.50) * 1000,
+            "p95_ms": _pct(recent, 0.95) * 1000,
+            "p99_ms": _pct(recent, 0.99) * 1000,
+            "max_ms": (recent[-1] if recent else 0.0) * 1000,
+        }
+        for (stage, labels), count, total, recent in sorted(series, key=lambda x: x[0])
+    ]
+    return {
+        "timings": timings,
+        "counters": [{"name": name, **dict(labels), "value": v} for (name, labels), v in sorted(counters)],
+    }
+
+
+def _fmt_labels(labels: Labels, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    items = labels + extra
+    if not items:
+        return ""
+    esc = lambda v: v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in items) + "}"
+
+
+def prometheus_text() -> str:
+    with _lock:
+        series = [(k, s.count, s.total, list(s.buckets)) for k, s in _series.items()]
+        counters = list(_counters.items())
+
+    lines = [
+        "# HELP slot_stage_seconds Time spent per pipeline stage.",
+        "# TYPE slot_stage_seconds histogram",
+    ]
+    for (stage, labels), count, total, buckets in sorted(series, key=lambda x: x[0]):
+        ls = (("stage", stage),) + labels
+        for le, n in zip(BUCKETS, buckets):
+            lines.append(f"slot_stage_seconds_bucket{_fmt_labels(ls, (('le', repr(le)),))} {n}")
+        lines.append(f"slot_stage_seconds_bucket{_fmt_labels(ls, (('le', '+Inf'),))} {count}")
+        lines.append(f"slot_stage_seconds_sum{_fmt_labels(ls)} {total}")
+        lines.append(f"slot_stage_seconds_count{_fmt_labels(ls)} {count}")
+
+    by_name: Dict[str, List[Tuple[Labels, float]]] = {}
+    for (name, labels), v in counters:
+        by_name.setdefault(name, []).append((labels, v))
+    for name, rows in sorted(by_name.items()):
+        lines.append(f"# TYPE slot_{name}_total counter")
+        for labels, v in rows:
+            lines.append(f"slot_{name}_total{_fmt_labels(labels)} {v}")
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path: Path) -> None:
+    """Writes the text exposition format atomically (e.g. for node_exporter's textfile collector)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(prometheus_text(), encoding="utf-8")
+    os.replace(tmp, path)
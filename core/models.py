@@ -2,14 +2,25 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass, asdict
-from typing import List, Dict, Optional, Any
+from collections.abc import MutableSequence
+from dataclasses import dataclass
+from typing import Iterator, List, Dict, Optional, Any, Sequence, Tuple, Union
+import threading
 import time
 import uuid
 
+# projects are shared between sessions by the storage cache
+_index_lock = threading.Lock()
+
+
+ASSET_FIELDS = ("id", "category", "name", "prompt", "provider", "model", "created_at", "path", "meta")
+
 
 @dataclass
 class Asset:
+    # slots: no per-instance __dict__, which matters at 10k+ assets per project
+    __slots__ = ASSET_FIELDS
+
     id: str
     category: str
     name: str
@@ -43,7 +54,133 @@ class Asset:
         )
 
     def to_dict(self) -> Dict[str, Any]:
-        return asdict(self)
+        # shallow: meta is shared with the asset, not deep-copied like asdict() would
+        return {
+            "id": self.id,
+            "category": self.category,
+            "name": self.name,
+            "prompt": self.prompt,
+            "provider": self.provider,
+            "model": self.model,
+            "created_at": self.created_at,
+            "path": self.path,
+            "meta": self.meta,
+        }
+
+
+class LazyAssets(MutableSequence):
+    """
+    Asset list backed by the raw records from project.json: an Asset is built the first time
+    its position is read. field() and records() serve categories/ids and serialization
+    without building anything.
+    """
+
+    def __init__(self, records: List[Dict[str, Any]]):
+        self._items: List[Union[Asset, Dict[str, Any]]] = list(records)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self._items)))]
+        item = self._items[i]
+        if isinstance(item, dict):
+            item = self._items[i] = Asset(**item)
+        return item
+
+    def __setitem__(self, i, value) -> None:
+        self._items[i] = value
+
+    def __delitem__(self, i) -> None:
+        del self._items[i]
+
+    def insert(self, i: int, value: Asset) -> None:
+        self._items.insert(i, value)
+
+    def __iter__(self) -> Iterator[Asset]:
+        for i in range(len(self._items)):
+            yield self[i]
+
+    def field(self, i: int, name: str) -> Any:
+        item = self._items[i]
+        return item[name] if isinstance(item, dict) else getattr(item, name)
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        for item in self._items:
+            yield item if isinstance(item, dict) else item.to_dict()
+
+
+def _field(assets: Sequence[Asset], i: int, name: str) -> Any:
+    return assets.field(i, name) if isinstance(assets, LazyAssets) else getattr(assets[i], name)
+
+
+class AssetIndex:
+    """
+    Secondary indexes over a project's asset list (newest first): per-category positions and
+    lowercased name/prompt text for substring search. Positions are counted from the oldest
+    asset, so they stay valid while assets are only prepended (add_asset); any other change
+    to the list triggers a rebuild. Only the assets a lookup returns are materialized.
+    """
+
+    def __init__(self, assets: Sequence[Asset]):
+        self._assets = assets
+        self._cats: Dict[str, List[int]] = {}
+        self._cat_lists: Dict[str, List[Asset]] = {}
+        self._text: Optional[List[Tuple[str, int]]] = None
+        self._size = 0
+        self._add(len(assets))
+
+    def _add(self, k: int) -> None:
+        """Indexes the k newest assets (positions len-1 .. len-k)."""
+        assets, n = self._assets, len(self._assets)
+        new: Dict[str, List[int]] = {}
+        for i in range(k):
+            new.setdefault(_field(assets, i, "category"), []).append(n - 1 - i)
+        for cat, positions in new.items():
+            self._cats[cat] = positions + self._cats.get(cat, [])
+            self._cat_lists.pop(cat, None)
+        if self._text is not None:
+            self._text[:0] = [(self._text_at(i), n - 1 - i) for i in range(k)]
+        self._size = n
+        self._head = _field(assets, 0, "id") if n else None
+
+    def _text_at(self, i: int) -> str:
+        return f"{_field(self._assets, i, 'name')}\n{_field(self._assets, i, 'prompt')}".lower()
+
+    def refresh(self, assets: Sequence[Asset]) -> bool:
+        """Catches up with assets prepended since the last call; False if a rebuild is needed."""
+        if assets is not self._assets or len(assets) < self._size:
+            return False
+        k = len(assets) - self._size
+        if k == 0:
+            return (_field(assets, 0, "id") if assets else None) == self._head
+        if self._size and _field(assets, k, "id") != self._head:
+            return False
+        self._add(k)
+        return True
+
+    def _at(self, pos: int) -> Asset:
+        return self._assets[self._size - 1 - pos]
+
+    def by_category(self, category: str) -> List[Asset]:
+        hit = self._cat_lists.get(category)
+        if hit is None:
+            hit = self._cat_lists[category] = [self._at(p) for p in self._cats.get(category, [])]
+        return hit
+
+    def category_counts(self) -> Dict[str, int]:
+        return {c: len(p) for c, p in self._cats.items()}
+
+    def search(self, query: str, category: Optional[str] = None) -> List[Asset]:
+        if self._text is None:
+            self._text = [(self._text_at(i), self._size - 1 - i) for i in range(self._size)]
+        q = query.lower()
+        hits = [p for text, p in self._text if q in text]
+        if category is not None:
+            in_cat = set(self._cats.get(category, ()))
+            hits = [p for p in hits if p in in_cat]
+        return [self._at(p) for p in hits]
 
 
 @dataclass
@@ -57,7 +194,7 @@ class Project:
     orientation: str
     created_at: float
     preview_config: Dict[str, Any]
-    assets: List[Asset]
+    assets: List[Asset]  # a LazyAssets when loaded with load_project(..., lazy=True)
 
     @staticmethod
     def new(
@@ -83,6 +220,69 @@ class Project:
         )
 
     def to_dict(self) -> Dict[str, Any]:
-        d = asdict(self)
-        d["assets"] = [a.to_dict() for a in self.assets]
-        return d
+        """JSON-ready dict; shares nested dicts with the project instead of deep-copying them."""
+        return {
+            "id": self.id,
+            "title": self.title,
+            "theme": self.theme,
+            "style_lock": self.style_lock,
+            "reels": self.reels,
+            "rows": self.rows,
+            "orientation": self.orientation,
+            "created_at": self.created_at,
+            "preview_config": self.preview_config,
+            "assets": list(self.records()),
+        }
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        """Asset records as plain dicts, without materializing lazily loaded assets."""
+        if isinstance(self.assets, LazyAssets):
+            return self.assets.records()
+        return (a.to_dict() for a in self.assets)
+
+    def _index(self) -> AssetIndex:
+        # caller holds _index_lock
+        idx = self.__dict__.get("_asset_index")
+        if idx is None or not idx.refresh(self.assets):
+            idx = self.__dict__["_asset_index"] = AssetIndex(self.assets)
+        return idx
+
+    def index(self) -> AssetIndex:
+        """
+        The up-to-date index. Its positions only stay valid while no assets are prepended:
+        read through by_category/search, which resolve them under the same lock as prepend().
+        """
+        with _index_lock:
+            return self._index()
+
+    def prepend(self, assets: Sequence[Asset]) -> None:
+        """Inserts assets at the front (newest first), atomically with respect to index lookups."""
+        with _index_lock:
+            for a in assets:
+                self.assets.insert(0, a)
+
+    def merge(self, assets: Sequence[Asset]) -> None:
+        """Inserts assets at their chronological place (by created_at) in the newest-first list."""
+        with _index_lock:
+            items = self.assets
+            for a in sorted(assets, key=lambda a: a.created_at):
+                i = 0
+                while i < len(items) and _field(items, i, "created_at") > a.created_at:
+                    i += 1
+                items.insert(i, a)
+
+    def by_category(self, category: str) -> List[Asset]:
+        """Assets of one category, newest first."""
+        with _index_lock:
+            return self._index().by_category(category)
+
+    def latest(self, category: str) -> Optional[Asset]:
+        assets = self.by_category(category)
+        return assets[0] if assets else None
+
+    def search(self, query: str, category: Optional[str] = None) -> List[Asset]:
+        """Assets whose name or prompt contains query (case-insensitive), newest first."""
+        if not query:
+            return self.by_category(category) if category else self.assets
+        with _index_lock:
+            return self._index().search(query, category)
@@ -0,0 +1,186 @@
+# core/pipeline.py
+
+"""
+Generation pipeline shared by the Generator and Extract pages:
+post-process provider output, write PNGs and record the assets.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional, Tuple
+import time
+import uuid
+
+from . import blobs
+from .models import Project, Asset
+from .storage import project_dir, add_assets
+from .image_post import PostJob, postprocess_batch, needs_postprocess
+from .providers import ImageProvider, GenResult, PRIORITY_BULK, sniff_format, decode_image
+from .thumbs import thumb_meta, write_thumbnails
+from .gen_cache import cached_generate
+
+EXTRACT_MAX_WORKERS = 4
+
+
+@dataclass
+class ExtractStage:
+    category: str
+    base_name: str
+    prompt: str
+    n: int = 1
+    transparent: bool = False
+
+
+def canvas_size(project: Project) -> Tuple[int, int]:
+    cfg = project.preview_config or {}
+    return cfg.get("canvas", {}).get("w", 1440), cfg.get("canvas", {}).get("h", 810)
+
+
+def save_result(
+    base: Path,
+    project: Project,
+    category: str,
+    base_name: str,
+    prompt: str,
+    result: GenResult,
+    provider_key: str,
+    model: str,
+    meta: Optional[Dict[str, Any]] = None,
+) -> List[str]:
+    """
+    Post-processes a generation for its category, writes the PNGs (plus thumbnails), moves
+    them into the blob store and records them in one batch under their assets/<category>
+    paths. PNGs that need no post-processing are written as returned. Returns the blob files.
+    """
+    tw, th = canvas_size(project)
+    pdir = project_dir(base, project.id)
+    adir = pdir / "assets" / category
+    adir.mkdir(parents=True, exist_ok=True)
+    # the suffix keeps two jobs for the same category finishing in the same second apart
+    ts = f"{int(time.time())}-{uuid.uuid4().hex[:8]}"
+
+    passthrough = (
+        not needs_postprocess(category)
+        and bool(result.encoded)
+        and all(sniff_format(b) == "PNG" for b in result.encoded)
+    )
+    paths = [adir / f"{base_name}-{ts}-{idx}.png" for idx in range(1, result.count + 1)]
+    if passthrough:
+        for fpath, data in zip(paths, result.encoded):
+            fpath.write_bytes(data)
+            write_thumbnails(decode_image(data), fpath)
+    elif result.encoded:
+        postprocess_batch([PostJob(data, category, tw, th, str(fpath)) for fpath, data in zip(paths, result.encoded)])
+    else:
+        postprocess_batch([PostJob.from_image(img, category, tw, th, str(fpath)) for fpath, img in zip(paths, result.images)])
+
+    saved = []
+    new_assets = []
+    for fpath in paths:
+        rel = str(fpath.relative_to(pdir))
+        key = blobs.ingest(base, fpath)
+        new_assets.append(
+            Asset.new(
+                category=category,
+                name=fpath.name,
+                prompt=prompt,
+                provider=provider_key,
+                model=model,
+                path=rel,
+                meta={**(meta or {}), "thumbs": thumb_meta(rel), "blob": key},
+            )
+        )
+        saved.append(str(blobs.blob_path(base, key)))
+
+    add_assets(base, project, new_assets)
+    return saved
+
+
+def extract_stages(project: Project, symbols_count: int, transparent: bool) -> List[ExtractStage]:
+    """The standard Extract set: Background, ReelBackground, Frame and a batch of Symbols."""
+    base = (
+        f"{project.theme}. {project.style_lock}\n\n"
+        "Match the exact style, materials, palette, lighting, and rendering quality of the approved concept.\n"
+        "No logos, no text.\n"
+    )
+    return [
+        ExtractStage("Background", "background", base + "Generate the BACKGROUND ONLY (no reels, no frame, no symbols). Full scene, high quality."),
+        ExtractStage("ReelBackground", "reelbg", base + "Generate the REEL BACKGROUND / reel window panel ONLY (no symbols, no frame). Subtle texture, readable."),
+        # Frame: try transparent if user enabled it; otherwise contain-mode canvas still works
+        ExtractStage("Frame", "frame", base + "Generate the FRAME OVERLAY ONLY. Center must be a clean hole for reels; frame is ornate and cohesive.", transparent=transparent),
+        ExtractStage("Symbols", "symbol", base + "Generate ONE slot SYMBOL icon, centered, readable silhouette, glossy render. Prefer transparent background if possible.", n=int(symbols_count), transparent=transparent),
+    ]
+
+
+def run_extract(
+    base: Path,
+    project: Project,
+    provider: ImageProvider,
+    provider_key: str,
+    api_key: str,
+    model: str,
+    size: str,
+    stages: List[ExtractStage],
+    on_progress: Optional[Callable[[ExtractStage, str, Any], None]] = None,
+    max_workers: int = EXTRACT_MAX_WORKERS,
+    force_fresh: bool = False,
+    session: Optional[str] = None,
+) -> List[str]:
+    """
+    Dispatches every stage's provider call concurrently (through the generation cache; large
+    stages are further split by generate_fanout) and saves each result as it arrives, so wall time is roughly the slowest
+    single call.
+
+    on_progress(stage, status, detail) is called on the caller's thread with status
+    "started" (detail None), "saved" (detail = saved paths) or "failed" (detail = exception).
+    If any stage fails the remaining ones still finish and the first error is re-raised.
+    Provider calls queue behind interactive generations (PRIORITY_BULK) under `session`.
+    """
+    tw, th = canvas_size(project)
+    meta = {"size": size, "canvas": f"{tw}x{th}", "orientation": project.orientation}
+
+    def _notify(stage: ExtractStage, status: str, detail: Any = None) -> None:
+        if on_progress:
+            on_progress(stage, status, detail)
+
+    saved_all: List[str] = []
+    first_error: Optional[BaseException] = None
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(stages)))) as pool:
+        futures = {}
+        for stage in stages:
+            fut = pool.submit(
+                cached_generate,
+                base,
+                provider,
+                api_key=api_key,
+                model=model,
+                prompt=stage.prompt,
+                n=stage.n,
+                size=size,
+                transparent=stage.transparent,
+                force_fresh=force_fresh,
+                priority=PRIORITY_BULK,
+                session=session,
+            )
+            futures[fut] = stage
+            _notify(stage, "started")
+
+        for fut in as_completed(futures):
+            stage = futures[fut]
+            try:
+                res = fut.result()
+                saved = save_result(base, project, stage.category, stage.base_name, stage.prompt, res, provider_key, model, meta)
+            except Exception as e:
+                first_error = first_error or e
+                _notify(stage, "failed", e)
+                continue
+            saved_all += saved
+            _notify(stage, "saved", saved)
+
+    if first_error is not None:
+        raise first_error
+    return saved_all
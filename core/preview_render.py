@@ -1,10 +1,57 @@
 from __future__ import annotations
+from collections import OrderedDict
 from PIL import Image
-from typing import Optional, Tuple, List
+from typing import Any, Dict, Hashable, Optional, Tuple, List
+import threading
 
-def _fit(img: Image.Image, w: int, h: int) -> Image.Image:
-    return img.resize((w, h), Image.Resampling.LANCZOS)
+from . import metrics
 
+# Resized layers keyed by (layer key, target size, resample filter), and flattened
+# composites of everything below the frame. Callers opt in by passing layer_keys
+# (e.g. asset ids); images without a key are resized on every call.
+LAYER_CACHE_SIZE = 48
+COMPOSITE_CACHE_SIZE = 8
+_RESAMPLE = Image.Resampling.LANCZOS
+
+_layers: "OrderedDict[Tuple[Hashable, Tuple[int, int], int], Image.Image]" = OrderedDict()
+_composites: "OrderedDict[Hashable, Image.Image]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def _lru_get(cache: OrderedDict, key: Hashable) -> Optional[Image.Image]:
+    with _lock:
+        hit = cache.get(key)
+        if hit is not None:
+            cache.move_to_end(key)
+        return hit
+
+
+def _lru_put(cache: OrderedDict, key: Hashable, value: Image.Image, limit: int) -> None:
+    with _lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > limit:
+            cache.popitem(last=False)
+
+
+def _fit(img: Image.Image, w: int, h: int, key: Optional[Hashable] = None) -> Image.Image:
+    if key is None:
+        return img.convert("RGBA").resize((w, h), _RESAMPLE)
+    ck = (key, (w, h), int(_RESAMPLE))
+    hit = _lru_get(_layers, ck)
+    if hit is None:
+        hit = img.convert("RGBA").resize((w, h), _RESAMPLE)
+        _lru_put(_layers, ck, hit, LAYER_CACHE_SIZE)
+    return hit
+
+
+def clear_cache() -> None:
+    with _lock:
+        _layers.clear()
+        _composites.clear()
+
+
+@metrics.timed("render_preview")
 def render_preview(
     canvas_size: Tuple[int,int],
     background: Optional[Image.Image]=None,
@@ -12,31 +59,62 @@ def render_preview(
     frame: Optional[Image.Image]=None,
     symbols_grid: Optional[List[List[Image.Image]]]=None,  # rows x reels
     reel_window_xywh: Tuple[int,int,int,int]=(320,150,640,420),
+    layer_keys: Optional[Dict[str, Any]]=None,
 ) -> Image.Image:
+    """
+    layer_keys optionally names each input so resized layers can be reused across calls:
+    {"background": k, "reel_bg": k, "frame": k, "symbols": [[k, ...], ...]} (same shape as symbols_grid).
+    When every layer below the frame is keyed, the flattened background + reel bg + symbols
+    composite is cached too, so a change to the frame only re-composites the top layer.
+    """
+    keys = layer_keys or {}
     cw, ch = canvas_size
-    out = Image.new("RGBA", (cw, ch), (0,0,0,0))
+    x, y, w, h = reel_window_xywh
 
-    if background:
-        out.alpha_composite(_fit(background.convert("RGBA"), cw, ch), (0,0))
+    sym_keys = keys.get("symbols")
+    lower = [(background, keys.get("background")), (reel_bg, keys.get("reel_bg"))]
+    lower_keyed = all(img is None or k is not None for img, k in lower) and (not symbols_grid or sym_keys is not None)
+    base_key = None
+    if lower_keyed:
+        base_key = (
+            (cw, ch), tuple(reel_window_xywh),
+            keys.get("background") if background else None,
+            keys.get("reel_bg") if reel_bg else None,
+            tuple(tuple(r) for r in sym_keys) if symbols_grid else None,
+        )
 
-    x, y, w, h = reel_window_xywh
+    base = _lru_get(_composites, base_key) if base_key is not None else None
+    if base is None:
+        base = Image.new("RGBA", (cw, ch), (0,0,0,0))
+
+        if background:
+            base.alpha_composite(_fit(background, cw, ch, keys.get("background")), (0,0))
+
+        if reel_bg:
+            base.alpha_composite(_fit(reel_bg, w, h, keys.get("reel_bg")), (x,y))
+
+        if symbols_grid:
+            rows = len(symbols_grid)
+            reels = len(symbols_grid[0]) if rows else 0
+            if rows and reels:
+                cell_w = w // reels
+                cell_h = h // rows
+                # a grid repeats a few symbols many times: resize each unique one once
+                fitted: Dict[Hashable, Image.Image] = {}
+                for r in range(rows):
+                    for c in range(reels):
+                        sym = symbols_grid[r][c]
+                        k = sym_keys[r][c] if sym_keys is not None else None
+                        local = k if k is not None else id(sym)
+                        if local not in fitted:
+                            fitted[local] = _fit(sym, cell_w, cell_h, k)
+                        base.alpha_composite(fitted[local], (x + c*cell_w, y + r*cell_h))
 
-    if reel_bg:
-        out.alpha_composite(_fit(reel_bg.convert("RGBA"), w, h), (x,y))
-
-    if symbols_grid:
-        rows = len(symbols_grid)
-        reels = len(symbols_grid[0]) if rows else 0
-        if rows and reels:
-            cell_w = w // reels
-            cell_h = h // rows
-            for r in range(rows):
-                for c in range(reels):
-                    sym = symbols_grid[r][c].convert("RGBA")
-                    sym_fit = _fit(sym, cell_w, cell_h)
-                    out.alpha_composite(sym_fit, (x + c*cell_w, y + r*cell_h))
+        if base_key is not None:
+            _lru_put(_composites, base_key, base, COMPOSITE_CACHE_SIZE)
 
+    out = base.copy()
     if frame:
-        out.alpha_composite(_fit(frame.convert("RGBA"), w, h), (x,y))
+        out.alpha_composite(_fit(frame, w, h, keys.get("frame")), (x,y))
 
     return out
@@ -1,69 +1,522 @@
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import List, Optional, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, List, Optional, Dict, Any, Tuple
 import base64
+import hashlib
+import random
+import threading
+import time
 from io import BytesIO
 from PIL import Image
 
+from . import metrics
+
+def decode_image(data: bytes) -> Image.Image:
+    # BytesIO over a bytes object shares its buffer instead of copying it
+    return Image.open(BytesIO(data))
+
+def sniff_format(data: bytes) -> Optional[str]:
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return "PNG"
+    if data[:3] == b"\xff\xd8\xff":
+        return "JPEG"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "WEBP"
+    return None
+
 @dataclass
 class GenResult:
-    images: List[Image.Image]
+    """
+    Provider output. `encoded` keeps the image bytes exactly as returned so they can be
+    written or cached without re-encoding; `images` decodes them lazily on first access.
+    Results built from in-memory images pass them as `decoded` instead.
+    """
     raw: Dict[str, Any]
+    encoded: List[bytes] = field(default_factory=list)
+    decoded: Optional[List[Image.Image]] = field(default=None, repr=False)
+
+    @property
+    def images(self) -> List[Image.Image]:
+        if self.decoded is None:
+            self.decoded = [decode_image(b) for b in self.encoded]
+        return self.decoded
+
+    @property
+    def count(self) -> int:
+        return len(self.decoded) if self.decoded is not None else len(self.encoded)
+
+    @staticmethod
+    def merge(results: List["GenResult"], raw: Dict[str, Any]) -> "GenResult":
+        if all(r.encoded for r in results):
+            return GenResult(raw=raw, encoded=[b for r in results for b in r.encoded])
+        return GenResult(raw=raw, decoded=[im for r in results for im in r.images])
+
+@dataclass(frozen=True)
+class ModelCaps:
+    max_n: int = 1
+    sizes: Tuple[str, ...] = ()  # empty: pass size through unchecked
+    transparent: bool = False
+
+    def coerce_size(self, size: str) -> str:
+        """Maps an unsupported WxH size to the supported one with the closest aspect ratio."""
+        if not self.sizes or size in self.sizes:
+            return size
+        def aspect(s: str) -> Optional[float]:
+            w, _, h = s.partition("x")
+            return int(w) / int(h) if w.isdigit() and h.isdigit() else None
+        want = aspect(size)
+        candidates = [s for s in self.sizes if aspect(s)]
+        if want is None or not candidates:
+            return self.sizes[0]
+        return min(candidates, key=lambda s: abs(aspect(s) - want))
+
+CLIENT_IDLE_TTL = 300.0
+CLIENT_POOL_MAX = 16
+
+@dataclass
+class _PooledClient:
+    client: Any
+    in_use: int = 0
+    last_used: float = 0.0
+
+class ClientPool:
+    """
+    Process-wide cache of SDK clients keyed by (provider, sha256(api_key)).
+    Both SDKs are thread-safe and keep their HTTP connections alive, so sessions
+    share warm clients; clients idle for longer than idle_ttl are closed.
+    """
+    def __init__(self, idle_ttl: float = CLIENT_IDLE_TTL, max_clients: int = CLIENT_POOL_MAX):
+        self.idle_ttl = idle_ttl
+        self.max_clients = max_clients
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, str], _PooledClient] = {}
+
+    @contextmanager
+    def checkout(self, provider: str, api_key: str, factory: Callable[[], Any]) -> Iterator[Any]:
+        key = (provider, hashlib.sha256(api_key.encode("utf-8")).hexdigest())
+        with self._lock:
+            self._evict(time.monotonic(), make_room=key not in self._entries)
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _PooledClient(client=factory())
+            entry.in_use += 1
+        try:
+            yield entry.client
+        finally:
+            with self._lock:
+                entry.in_use -= 1
+                entry.last_used = time.monotonic()
+
+    def _evict(self, now: float, make_room: bool) -> None:
+        idle = sorted(
+            ((k, e) for k, e in self._entries.items() if e.in_use == 0),
+            key=lambda ke: ke[1].last_used,
+        )
+        over = len(self._entries) - self.max_clients + 1 if make_room else 0
+        for i, (k, e) in enumerate(idle):
+            if i < over or now - e.last_used > self.idle_ttl:
+                del self._entries[k]
+                _close_client(e.client)
+
+    def clear(self) -> None:
+        with self._lock:
+            for k in [k for k, e in self._entries.items() if e.in_use == 0]:
+                _close_client(self._entries.pop(k).client)
+
+def _close_client(client: Any) -> None:
+    close = getattr(client, "close", None)
+    if callable(close):
+        try:
+            close()
+        except Exception:
+            pass
+
+CLIENT_POOL = ClientPool()
+
+# Provider calls are admitted by one process-wide governor. Lower priority values go first;
+# within a priority, sessions take turns (start-time fair queueing), so one session's
+# 14-symbol Extract cannot starve another's single generation.
+PRIORITY_INTERACTIVE = 0  # single generations from the Generator page
+PRIORITY_BULK = 1  # Extract fan-outs
+PRIORITY_BACKGROUND = 2  # headless batch runs
+
+GOVERNOR_MAX_IN_FLIGHT = 8
+# requests per minute; providers/models without an entry are not rate limited
+KEY_RPM: Dict[str, float] = {"OpenAI": 50, "Gemini (Imagen)": 60}  # per (provider name, api key)
+MODEL_RPM: Dict[str, float] = {"dall-e-3": 15}  # per (provider, api key, model)
+GOVERNOR_WAIT_WINDOW = 256
+
+class TokenBucket:
+    """`rate_per_min` tokens per minute, holding at most `burst` (default: ten seconds' worth)."""
+    def __init__(self, rate_per_min: float, burst: Optional[float] = None):
+        self.rate = rate_per_min / 60.0
+        self.capacity = burst if burst is not None else max(1.0, self.rate * 10)
+        self.tokens = self.capacity
+        self.stamp = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until one token is available (0 if one is available now)."""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+    def drain(self, now: float) -> None:
+        self._refill(now)
+        self.tokens = min(self.tokens, 0.0)
+
+@dataclass
+class _Ticket:
+    priority: int
+    tag: float
+    seq: int
+    session: str
+    buckets: Tuple[TokenBucket, ...]
+    enqueued: float
+    admitted: bool = False
+
+    def order(self) -> Tuple[int, float, int]:
+        return self.priority, self.tag, self.seq
+
+class ProviderGovernor:
+    """
+    Admits provider calls under per-key and per-model token buckets and a cap on calls in
+    flight. stats() reports queue depth and recent admission waits for the UI.
+    """
+    def __init__(self, max_in_flight: int = GOVERNOR_MAX_IN_FLIGHT):
+        self.max_in_flight = max_in_flight
+        self._cond = threading.Condition()
+        self._buckets: Dict[Tuple[str, ...], TokenBucket] = {}
+        self._waiting: List[_Ticket] = []
+        self._in_flight = 0
+        self._seq = 0
+        self._vtime = 0.0
+        self._last_tag: Dict[str, float] = {}
+        self._waits: List[float] = []
+        self._admitted = 0
+
+    def _bucket_list(self, provider: str, api_key: str, model: str) -> Tuple[TokenBucket, ...]:
+        kh = hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+        out = []
+        for key, rpm in (((provider, kh), KEY_RPM.get(provider)), ((provider, kh, model), MODEL_RPM.get(model))):
+            if rpm:
+                b = self._buckets.get(key)
+                if b is None:
+                    b = self._buckets[key] = TokenBucket(rpm)
+                out.append(b)
+        return tuple(out)
+
+    def _admit(self, now: float) -> Optional[float]:
+        """Admits every waiting ticket that fits, best first; returns the shortest bucket wait left."""
+        soonest: Optional[float] = None
+        for t in sorted(self._waiting, key=_Ticket.order):
+            if self._in_flight >= self.max_in_flight:
+                return soonest
+            wait = max((b.wait_time(now) for b in t.buckets), default=0.0)
+            if wait > 0:
+                soonest = wait if soonest is None else min(soonest, wait)
+                continue
+            for b in t.buckets:
+                b.take()
+            t.admitted = True
+            self._waiting.remove(t)
+            self._in_flight += 1
+            self._vtime = max(self._vtime, t.tag)
+            self._admitted += 1
+            self._waits.append(now - t.enqueued)
+            del self._waits[:-GOVERNOR_WAIT_WINDOW]
+        return soonest
+
+    @contextmanager
+    def slot(self, provider: str, api_key: str, model: str, priority: int = PRIORITY_INTERACTIVE, session: Optional[str] = None) -> Iterator[float]:
+        """Blocks until the call may start; yields the seconds spent queued."""
+        session = session or "default"
+        with self._cond:
+            now = time.monotonic()
+            tag = max(self._vtime, self._last_tag.get(session, 0.0)) + 1
+            self._last_tag[session] = tag
+            self._seq += 1
+            ticket = _Ticket(priority, tag, self._seq, session, self._bucket_list(provider, api_key, model), now)
+            self._waiting.append(ticket)
+            while True:
+                wait = self._admit(time.monotonic())
+                if ticket.admitted:
+                    break
+                self._cond.wait(timeout=wait)
+            self._cond.notify_all()
+        waited = time.monotonic() - ticket.enqueued
+        metrics.observe("provider_queue_wait", waited, provider=provider)
+        try:
+            yield waited
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                self._cond.notify_all()
+
+    def throttled(self, provider: str, api_key: str, model: str) -> None:
+        """Empties the call's buckets after a 429 so queued calls back off together."""
+        with self._cond:
+            now = time.monotonic()
+            for b in self._bucket_list(provider, api_key, model):
+                b.drain(now)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            waits = sorted(self._waits)
+            by_priority: Dict[int, int] = {}
+            sessions = set()
+            for t in self._waiting:
+                by_priority[t.priority] = by_priority.get(t.priority, 0) + 1
+                sessions.add(t.session)
+            return {
+                "in_flight": self._in_flight,
+                "max_in_flight": self.max_in_flight,
+                "queued": len(self._waiting),
+                "queued_by_priority": by_priority,
+                "queued_sessions": len(sessions),
+                "admitted": self._admitted,
+                "wait_p50_s": waits[len(waits) // 2] if waits else 0.0,
+                "wait_max_s": waits[-1] if waits else 0.0,
+            }
+
+GOVERNOR = ProviderGovernor()
 
 class ImageProvider:
     name: str = "base"
+    # lean: keep image payloads out of GenResult.raw (they are already in GenResult.encoded)
+    lean: bool = True
+    model_caps: Dict[str, ModelCaps] = {}
+    default_caps: ModelCaps = ModelCaps()
+
+    def caps(self, model: str) -> ModelCaps:
+        return self.model_caps.get(model, self.default_caps)
+
     def generate(self, api_key: str, model: str, prompt: str, size: str="1024x1024", n: int=1, transparent: bool=False) -> GenResult:
         raise NotImplementedError
 
 class OpenAIProvider(ImageProvider):
     name = "OpenAI"
+    # Docs: https://platform.openai.com/docs/api-reference/images/create
+    model_caps = {
+        "gpt-image-1.5": ModelCaps(max_n=10, sizes=("1024x1024", "1536x1024", "1024x1536"), transparent=True),
+        "gpt-image-1": ModelCaps(max_n=10, sizes=("1024x1024", "1536x1024", "1024x1536"), transparent=True),
+        "dall-e-3": ModelCaps(max_n=1, sizes=("1024x1024", "1792x1024", "1024x1792"), transparent=False),
+    }
     def generate(self, api_key: str, model: str, prompt: str, size: str="1024x1024", n: int=1, transparent: bool=False) -> GenResult:
         # Docs: https://platform.openai.com/docs/api-reference/images
-        from openai import OpenAI
-        client = OpenAI(api_key=api_key)
         kwargs = {"model": model, "prompt": prompt, "n": n, "size": size}
         # GPT image models support background=transparent + output_format
         if transparent:
             kwargs["background"] = "transparent"
             kwargs["output_format"] = "png"
-        resp = client.images.generate(**kwargs)
-        imgs = []
-        raw = resp.model_dump() if hasattr(resp, "model_dump") else dict(resp)
-        for item in resp.data:
-            b64 = getattr(item, "b64_json", None) or item.get("b64_json")
-            img_bytes = base64.b64decode(b64)
-            imgs.append(Image.open(BytesIO(img_bytes)).convert("RGBA"))
-        return GenResult(images=imgs, raw=raw)
+        with CLIENT_POOL.checkout(self.name, api_key, lambda: self._new_client(api_key)) as client:
+            with metrics.timer("provider_call", provider=self.name, model=model):
+                resp = client.images.generate(**kwargs)
+        encoded = []
+        with metrics.timer("b64_decode", provider=self.name):
+            for item in resp.data:
+                b64 = getattr(item, "b64_json", None) or item.get("b64_json")
+                encoded.append(base64.b64decode(b64))
+        raw = _dump_response(resp, {"data": {"__all__": {"b64_json"}}} if self.lean else None)
+        return GenResult(raw=raw, encoded=encoded)
+
+    @staticmethod
+    def _new_client(api_key: str):
+        from openai import OpenAI
+        return OpenAI(api_key=api_key)
 
 class GeminiImagenProvider(ImageProvider):
     name = "Gemini (Imagen)"
+    # number_of_images is capped at 4; image_size is '1K' or '2K'
+    default_caps = ModelCaps(max_n=4, sizes=("1K", "2K"), transparent=False)
     def generate(self, api_key: str, model: str, prompt: str, size: str="1K", n: int=1, transparent: bool=False) -> GenResult:
         # Docs: https://ai.google.dev/gemini-api/docs/imagen
         # Uses google-genai SDK (python-genai). The Imagen API currently supports specific params.
-        from google import genai
         from google.genai import types
 
-        client = genai.Client(api_key=api_key)
         # size for Imagen is via image_size ('1K' or '2K') and aspect_ratio; we map to defaults
         config = types.GenerateImagesConfig(
             number_of_images=int(n),
             image_size=size,  # '1K' or '2K'
         )
-        resp = client.models.generate_images(model=model, prompt=prompt, config=config)
-        imgs = []
+        with CLIENT_POOL.checkout(self.name, api_key, lambda: self._new_client(api_key)) as client:
+            with metrics.timer("provider_call", provider=self.name, model=model):
+                resp = client.models.generate_images(model=model, prompt=prompt, config=config)
+        encoded = []
         # response.generated_images -> generated_image.image.image_bytes (base64)
-        for gi in resp.generated_images:
-            # The SDK returns bytes base64-encoded string in some contexts; handle both
-            b = gi.image.image_bytes
-            if isinstance(b, str):
-                img_bytes = base64.b64decode(b)
-            else:
-                img_bytes = b
-            imgs.append(Image.open(BytesIO(img_bytes)).convert("RGBA"))
-        raw = resp.model_dump() if hasattr(resp, "model_dump") else {"generated_images": len(resp.generated_images)}
-        return GenResult(images=imgs, raw=raw)
+        with metrics.timer("b64_decode", provider=self.name):
+            for gi in resp.generated_images:
+                # The SDK returns bytes base64-encoded string in some contexts; handle both
+                b = gi.image.image_bytes
+                encoded.append(base64.b64decode(b) if isinstance(b, str) else b)
+        exclude = {"generated_images": {"__all__": {"image": {"image_bytes"}}}} if self.lean else None
+        raw = _dump_response(resp, exclude, fallback={"generated_images": len(resp.generated_images)})
+        return GenResult(raw=raw, encoded=encoded)
+
+    @staticmethod
+    def _new_client(api_key: str):
+        from google import genai
+        return genai.Client(api_key=api_key)
+
+class StubProvider(ImageProvider):
+    """
+    Offline provider for benchmarks, tests and dry runs: returns deterministic noise PNGs
+    (seeded by prompt and size) after an optional simulated latency. Ignores the API key.
+    """
+    name = "Stub"
+    default_caps = ModelCaps(max_n=10, transparent=True)
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+
+    def generate(self, api_key: str, model: str, prompt: str, size: str="1024x1024", n: int=1, transparent: bool=False) -> GenResult:
+        if self.latency:
+            time.sleep(self.latency)
+        w, h = _stub_dims(size)
+        mode = "RGBA" if transparent else "RGB"
+        seed = hashlib.sha256(f"{model}\0{prompt}\0{size}".encode("utf-8")).digest()
+        encoded = []
+        for i in range(n):
+            rng = random.Random(seed + bytes([i % 256]))
+            img = Image.frombytes(mode, (w, h), rng.randbytes(w * h * len(mode)))
+            buf = BytesIO()
+            img.save(buf, "PNG", compress_level=1)
+            encoded.append(buf.getvalue())
+        return GenResult(raw={"stub": True, "model": model, "size": f"{w}x{h}", "n": n}, encoded=encoded)
+
+def _stub_dims(size: str) -> Tuple[int, int]:
+    if size.upper().endswith("K") and size[:-1].isdigit():
+        side = 1024 * int(size[:-1])
+        return side, side
+    w, _, h = size.partition("x")
+    return (int(w), int(h)) if w.isdigit() and h.isdigit() else (1024, 1024)
+
+def _dump_response(resp: Any, exclude: Optional[Dict[str, Any]], fallback: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """model_dump() without the excluded (payload) fields, so base64 strings are never copied into raw."""
+    if not hasattr(resp, "model_dump"):
+        return fallback if fallback is not None else dict(resp)
+    if exclude is None:
+        return resp.model_dump()
+    try:
+        return resp.model_dump(exclude=exclude)
+    except (TypeError, ValueError):
+        return fallback if fallback is not None else {}
 
 PROVIDERS = {
     "OpenAI": OpenAIProvider(),
     "Gemini": GeminiImagenProvider(),
 }
+
+
+FANOUT_MAX_WORKERS = 4
+FANOUT_RETRIES = 3
+FANOUT_BACKOFF_BASE = 1.0
+FANOUT_BACKOFF_CAP = 20.0
+
+
+def _is_transient(e: BaseException) -> bool:
+    """429 and 5xx from either SDK, plus connection-level failures."""
+    if isinstance(e, (ConnectionError, TimeoutError)):
+        return True
+    if type(e).__name__ in ("APIConnectionError", "APITimeoutError"):
+        return True
+    status = _status_code(e)
+    return isinstance(status, int) and (status == 429 or 500 <= status < 600)
+
+
+def _status_code(e: BaseException) -> Optional[int]:
+    status = getattr(e, "status_code", None) or getattr(e, "code", None)
+    if status is None:
+        status = getattr(getattr(e, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def _split(n: int, max_n: int) -> List[int]:
+    """Splits n into the fewest legal chunks, sized as evenly as possible (14 / 4 -> [4, 4, 3, 3])."""
+    k = -(-n // max_n)
+    q, r = divmod(n, k)
+    return [q + 1] * r + [q] * (k - r)
+
+
+def _generate_with_retry(
+    provider: ImageProvider,
+    retries: int,
+    priority: int = PRIORITY_INTERACTIVE,
+    session: Optional[str] = None,
+    **kwargs,
+) -> GenResult:
+    attempt = 0
+    while True:
+        try:
+            # every attempt is admitted by the governor, so retries count against the quota too
+            with GOVERNOR.slot(provider.name, kwargs["api_key"], kwargs["model"], priority, session) as waited:
+                res = provider.generate(**kwargs)
+            res.raw["queue_wait_s"] = round(waited, 3)
+            return res
+        except Exception as e:
+            if _status_code(e) == 429:
+                GOVERNOR.throttled(provider.name, kwargs["api_key"], kwargs["model"])
+            if attempt >= retries or not _is_transient(e):
+                metrics.incr("provider_errors", provider=provider.name, model=kwargs.get("model"))
+                raise
+            metrics.incr("provider_retries", provider=provider.name, model=kwargs.get("model"))
+            # full jitter: spreads retries of parallel chunks instead of stampeding together
+            time.sleep(random.uniform(0, min(FANOUT_BACKOFF_CAP, FANOUT_BACKOFF_BASE * 2 ** attempt)))
+            attempt += 1
+
+
+def generate_fanout(
+    provider: ImageProvider,
+    api_key: str,
+    model: str,
+    prompt: str,
+    size: str,
+    n: int = 1,
+    transparent: bool = False,
+    max_workers: int = FANOUT_MAX_WORKERS,
+    retries: int = FANOUT_RETRIES,
+    priority: int = PRIORITY_INTERACTIVE,
+    session: Optional[str] = None,
+) -> GenResult:
+    """
+    Generates n images within the model's limits: the request is split into chunks of at most
+    caps.max_n, the chunks run concurrently with jittered retries on transient errors, and the
+    results are merged into one GenResult. Unsupported sizes and transparency are adapted to the
+    model. Chunks that still fail are reported in raw["errors"]; only a total failure raises.
+    Every chunk is admitted by GOVERNOR under the given priority and fairness session.
+    """
+    caps = provider.caps(model)
+    kwargs = {
+        "api_key": api_key,
+        "model": model,
+        "prompt": prompt,
+        "size": caps.coerce_size(size),
+        "transparent": bool(transparent and caps.transparent),
+    }
+    chunks = _split(max(1, int(n)), max(1, caps.max_n))
+    if len(chunks) == 1:
+        return _generate_with_retry(provider, retries, priority, session, n=chunks[0], **kwargs)
+
+    results: List[GenResult] = []
+    errors: List[BaseException] = []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks)))) as pool:
+        futures = [pool.submit(_generate_with_retry, provider, retries, priority, session, n=c, **kwargs) for c in chunks]
+        for fut in futures:
+            try:
+                res = fut.result()
+            except Exception as e:
+                errors.append(e)
+                continue
+            results.append(res)
+
+    if not results and errors:
+        raise errors[0]
+    raw = {"chunks": [r.raw for r in results], "errors": [repr(e) for e in errors]}
+    return GenResult.merge(results, raw)
@@ -2,16 +2,58 @@
 
 from __future__ import annotations
 
+from collections import OrderedDict
 from pathlib import Path
+import copy
 import json
-from typing import Dict, Any, List
-from .models import Project, Asset
+import os
+import shutil
+import threading
+import time
+import uuid
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from .models import Project, Asset, LazyAssets, _field
+from . import catalog, metrics
+from .blobs import BLOB_DIR, blob_rel
+
+# project.json is a snapshot; assets added since the last snapshot are appended
+# to assets.log (one JSON record per line) and folded back in by compaction.
+SNAPSHOT_FILE = "project.json"
+JOURNAL_FILE = "assets.log"
+JOURNAL_COMPACT_BYTES = 4 * 1024 * 1024
+
+# Linux ioctl that makes dst share src's extents (copy-on-write; btrfs, XFS, bcachefs...)
+FICLONE = 0x40049409
+
+# Parsed projects shared by every page and session in this process, keyed by
+# (base, project id) and validated against the snapshot/journal stat signature.
+PROJECT_CACHE_SIZE = 32
+_Sig = Tuple[Tuple[int, int], Optional[Tuple[int, int]]]
+_cache: "OrderedDict[Tuple[str, str], Tuple[_Sig, Project]]" = OrderedDict()
+_cache_lock = threading.Lock()
+_write_locks: Dict[Tuple[str, str], threading.RLock] = {}
 
 
 def project_dir(base: Path, project_id: str) -> Path:
     return base / "data" / "projects" / project_id
 
 
+def asset_file(pdir: Path, asset: Asset) -> Path:
+    """The file holding an asset's image: its blob (see core.blobs) or, for older assets, pdir / asset.path."""
+    key = asset.meta.get("blob")
+    if key:
+        # pdir is <base>/data/projects/<id>; blobs live in <base>/data/blobs
+        return pdir.parent.parent / BLOB_DIR / blob_rel(key)
+    return pdir / asset.path
+
+
+def blob_backed_files(base: Path, project_id: str) -> Dict[str, Path]:
+    """{asset.path: blob file} for the project's assets stored in the blob store."""
+    pdir = project_dir(base, project_id)
+    project = load_project(base, project_id, lazy=True)
+    return {r["path"]: asset_file(pdir, Asset(**r)) for r in project.records() if "blob" in r["meta"]}
+
+
 def ensure_project_dirs(base: Path, project_id: str, categories: List[str]) -> None:
     pdir = project_dir(base, project_id)
     (pdir / "assets").mkdir(parents=True, exist_ok=True)
@@ -19,20 +61,209 @@ def ensure_project_dirs(base: Path, project_id: str, categories: List[str]) -> N
         (pdir / "assets" / c).mkdir(parents=True, exist_ok=True)
 
 
+def _write_snapshot(pdir: Path, project: Project) -> None:
+    tmp = pdir / (SNAPSHOT_FILE + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(json.dumps(project.to_dict(), separators=(",", ":"), ensure_ascii=False))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, pdir / SNAPSHOT_FILE)
+
+
+def _stat_sig(p: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = p.stat()
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _signature(pdir: Path) -> Optional[_Sig]:
+    snap = _stat_sig(pdir / SNAPSHOT_FILE)
+    if snap is None:
+        return None
+    return (snap, _stat_sig(pdir / JOURNAL_FILE))
+
+
+def _cache_store(key: Tuple[str, str], sig: _Sig, project: Project) -> None:
+    with _cache_lock:
+        _cache[key] = (sig, project)
+        _cache.move_to_end(key)
+        while len(_cache) > PROJECT_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def _cache_put(base: Path, project: Project) -> None:
+    sig = _signature(project_dir(base, project.id))
+    if sig is not None:
+        _cache_store((str(base), project.id), sig, project)
+
+
+def _cache_advance(base: Path, project: Project, before: Optional[_Sig]) -> None:
+    """
+    After an append through `project`: re-cache it under the new signature only if it is the
+    cached object and was current before the append. Otherwise it may be a stale copy missing
+    other writers' assets, so drop the entry and let the next load read the disk.
+    """
+    key = (str(base), project.id)
+    with _cache_lock:
+        hit = _cache.get(key)
+        current = hit is not None and hit[1] is project and hit[0] == before
+    if current:
+        _cache_put(base, project)
+    else:
+        invalidate_project(base, project.id)
+
+
+def _write_lock(base: Path, project_id: str) -> threading.RLock:
+    with _cache_lock:
+        return _write_locks.setdefault((str(base), project_id), threading.RLock())
+
+
+def invalidate_project(base: Path, project_id: str) -> None:
+    with _cache_lock:
+        _cache.pop((str(base), project_id), None)
+
+
+def _merge_from_disk(base: Path, pdir: Path, project: Project) -> None:
+    """
+    Merges in the assets on disk (snapshot + journal) that this object hasn't seen, e.g. ones
+    added by another session, a job or an object loaded before a cache eviction. Call it
+    under the write lock before rewriting the snapshot, so the journal is never folded from
+    a stale copy.
+    """
+    sig = _signature(pdir)
+    if sig is None:
+        return
+    with _cache_lock:
+        hit = _cache.get((str(base), project.id))
+    if hit is not None and hit[1] is project and hit[0] == sig:
+        return  # this object is what's on disk
+    assets = project.assets
+    known = {_field(assets, i, "id") for i in range(len(assets))}
+    missing = [r for r in _read_project(pdir, project.id, lazy=True).records() if r["id"] not in known]
+    # by created_at: a disk-only record can be older than this object's own appends
+    project.merge([Asset(**r) for r in missing])
+
+
+def _save_locked(base: Path, pdir: Path, project: Project) -> None:
+    _write_snapshot(pdir, project)
+    (pdir / JOURNAL_FILE).unlink(missing_ok=True)
+    _cache_put(base, project)
+
+
 def save_project(base: Path, project: Project) -> None:
+    """
+    Write a full snapshot of the project and drop the now-redundant journal. Assets recorded
+    on disk that this object is missing are merged into it first, never dropped.
+    """
     pdir = project_dir(base, project.id)
     pdir.mkdir(parents=True, exist_ok=True)
-    (pdir / "project.json").write_text(
-        json.dumps(project.to_dict(), indent=2, ensure_ascii=False),
-        encoding="utf-8",
-    )
+    with _write_lock(base, project.id), metrics.timer("save_project"):
+        _merge_from_disk(base, pdir, project)
+        _save_locked(base, pdir, project)
+    catalog.upsert_project(base, project)
+
+
+def _drop_torn_tail(jp: Path) -> None:
+    """Cuts a partial last line (an interrupted append) so the next append doesn't get glued to it."""
+    try:
+        f = open(jp, "rb+")
+    except FileNotFoundError:
+        return
+    with f:
+        end = f.seek(0, os.SEEK_END)
+        if end == 0:
+            return
+        f.seek(end - 1)
+        if f.read(1) == b"\n":
+            return
+        pos = end
+        while pos > 0:
+            start = max(0, pos - 64 * 1024)
+            f.seek(start)
+            i = f.read(pos - start).rfind(b"\n")
+            if i >= 0:
+                pos = start + i + 1
+                break
+            pos = start
+        f.truncate(pos)
+        f.flush()
+        os.fsync(f.fileno())
 
 
-def load_project(base: Path, project_id: str) -> Project:
+def _read_journal(pdir: Path) -> List[Dict[str, Any]]:
+    jp = pdir / JOURNAL_FILE
+    if not jp.exists():
+        return []
+    records = []
+    with open(jp, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # torn write from an interrupted append (journals written before appends
+                # started cutting torn tails can have valid records after it)
+                continue
+    return records
+
+
+def load_project(base: Path, project_id: str, lazy: bool = False) -> Project:
+    """
+    Returns the project, served from the process-wide cache while project.json
+    and assets.log are unchanged on disk. The returned object is shared between
+    sessions: mutate it only through save_project/add_assets.
+
+    lazy=True keeps project.assets as a LazyAssets over the parsed records, so an Asset is
+    only built when it is read (by_category/latest/search/pagination touch just what they return).
+    """
     pdir = project_dir(base, project_id)
-    raw = json.loads((pdir / "project.json").read_text(encoding="utf-8"))
+    key = (str(base), project_id)
+    sig = _signature(pdir)
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit is not None and hit[0] == sig:
+            _cache.move_to_end(key)
+            proj = hit[1]
+            if lazy or not isinstance(proj.assets, LazyAssets):
+                return proj
+    if hit is not None and hit[0] == sig:
+        # an eager caller got a project cached by a lazy one: materialize it in place
+        with _write_lock(base, project_id):
+            if isinstance(proj.assets, LazyAssets):
+                proj.assets = list(proj.assets)
+        return proj
+
+    with metrics.timer("load_project"):
+        proj = _read_project(pdir, project_id, lazy)
+    if sig is not None:
+        _cache_store(key, sig, proj)
+    return proj
+
 
-    assets = [Asset(**a) for a in raw.get("assets", [])]
+def _read_project(pdir: Path, project_id: str, lazy: bool = False) -> Project:
+    raw = json.loads((pdir / SNAPSHOT_FILE).read_text(encoding="utf-8"))
+
+    records = raw.get("assets", [])
+
+    # Replay journal on top of the snapshot (newest first, like add_asset).
+    # Records may already be in the snapshot if a compaction was interrupted.
+    seen = {a["id"] for a in records}
+    replayed = []
+    for rec in _read_journal(pdir):
+        if rec.get("op") != "add":
+            continue
+        a = rec["asset"]
+        if a["id"] in seen:
+            continue
+        seen.add(a["id"])
+        replayed.append(a)
+    if replayed:
+        records = replayed[::-1] + records
+    assets = LazyAssets(records) if lazy else [Asset(**a) for a in records]
 
     # Backward compatibility: older projects may not have orientation
     orientation = raw.get("orientation") or raw.get("preview_config", {}).get("orientation") or "Landscape"
@@ -53,28 +284,160 @@ def load_project(base: Path, project_id: str) -> Project:
 
 
 def list_projects(base: Path) -> List[Dict[str, Any]]:
-    root = base / "data" / "projects"
-    root.mkdir(parents=True, exist_ok=True)
+    """
+    Newest-first project summaries (id, title, created_at) served from the catalog. Rows whose
+    folder was deleted or moved by hand are dropped from the catalog on the way.
+    """
+    with metrics.timer("list_projects"):
+        rows = catalog.list_projects(base)
+        gone = {r["id"] for r in rows if not (project_dir(base, r["id"]) / SNAPSHOT_FILE).exists()}
+        for pid in gone:
+            catalog.remove_project(base, pid)
+            invalidate_project(base, pid)
+        return [r for r in rows if r["id"] not in gone] if gone else rows
 
-    out: List[Dict[str, Any]] = []
-    for p in root.iterdir():
-        if not p.is_dir():
-            continue
-        pj = p / "project.json"
-        if pj.exists():
-            raw = json.loads(pj.read_text(encoding="utf-8"))
-            out.append(
-                {
-                    "id": raw.get("id", p.name),
-                    "title": raw.get("title", p.name),
-                    "created_at": raw.get("created_at", 0),
-                }
-            )
 
-    out.sort(key=lambda x: x["created_at"], reverse=True)
-    return out
+def add_assets(base: Path, project: Project, assets: Iterable[Asset]) -> None:
+    """
+    Appends assets to the project's journal with a single fsync.
+    Assets saved without thumbnails (no meta["thumbs"]) get them generated first.
+    The journal is compacted into project.json once it grows past JOURNAL_COMPACT_BYTES.
+    """
+    assets = list(assets)
+    if not assets:
+        return
+    pdir = project_dir(base, project.id)
+    pdir.mkdir(parents=True, exist_ok=True)
+
+    from .thumbs import ensure_thumbnails
+    for a in assets:
+        if "thumbs" not in a.meta:
+            ensure_thumbnails(pdir, a)
+
+    lines = "".join(
+        json.dumps({"op": "add", "asset": a.to_dict()}, separators=(",", ":"), ensure_ascii=False) + "\n"
+        for a in assets
+    )
+    jp = pdir / JOURNAL_FILE
+    with _write_lock(base, project.id):
+        before = _signature(pdir)
+        _drop_torn_tail(jp)
+        with open(jp, "a", encoding="utf-8") as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+        project.prepend(assets)
+
+        compact = jp.stat().st_size >= JOURNAL_COMPACT_BYTES
+        if compact:
+            save_project(base, project)  # merges in what other writers journaled
+        else:
+            _cache_advance(base, project, before)
+    if not compact:
+        catalog.bump_asset_counts(base, project.id, (a.category for a in assets))
+    catalog.add_blob_refs(base, (a.meta["blob"] for a in assets if "blob" in a.meta))
 
 
 def add_asset(base: Path, project: Project, asset: Asset) -> None:
-    project.assets.insert(0, asset)
-    save_project(base, project)
+    add_assets(base, project, [asset])
+
+
+def remove_assets(base: Path, project: Project, asset_ids: Iterable[str]) -> List[Dict[str, Any]]:
+    """
+    Drops asset records (not their files) and writes a fresh snapshot, which also folds in
+    the journal. Blob references held by the removed records are released. Returns the removed records.
+    """
+    ids = set(asset_ids)
+    if not ids:
+        return []
+    pdir = project_dir(base, project.id)
+    with _write_lock(base, project.id):
+        _merge_from_disk(base, pdir, project)
+        kept, removed = [], []
+        for r in project.records():
+            (removed if r["id"] in ids else kept).append(r)
+        if not removed:
+            return []
+        if isinstance(project.assets, LazyAssets):
+            project.assets = LazyAssets(kept)
+        else:
+            project.assets = [a for a in project.assets if a.id not in ids]
+        _save_locked(base, pdir, project)
+    catalog.upsert_project(base, project)
+    catalog.add_blob_refs(base, (r["meta"]["blob"] for r in removed if "blob" in r["meta"]), delta=-1)
+    return removed
+
+
+def compact_project(base: Path, project_id: str) -> Project:
+    """Folds the journal into project.json so the folder is self-contained (e.g. before export)."""
+    project = load_project(base, project_id, lazy=True)
+    if (project_dir(base, project_id) / JOURNAL_FILE).exists():
+        save_project(base, project)
+    return project
+
+
+def _clone_file(src: Path, dst: Path, reflink: bool = True) -> str:
+    """
+    Copies src to dst as cheaply as the filesystem allows: a reflink, else a hardlink, else a
+    real copy. Returns which one was made. Hardlinks are safe because every writer replaces
+    files (write a temp file, os.replace) instead of editing them, which breaks the link.
+    """
+    try:
+        if not reflink:
+            raise OSError("reflink skipped")
+        import fcntl
+
+        with open(src, "rb") as fs, open(dst, "wb") as fd:
+            fcntl.ioctl(fd.fileno(), FICLONE, fs.fileno())
+        return "reflink"
+    except (ImportError, OSError):
+        dst.unlink(missing_ok=True)
+    try:
+        os.link(src, dst)
+        return "hardlink"
+    except OSError:
+        shutil.copy2(src, dst)
+        return "copy"
+
+
+def duplicate_project(base: Path, project_id: str, title: Optional[str] = None) -> Tuple[Project, Dict[str, int]]:
+    """
+    Forks a project under a new id with the same settings and assets. Blob-backed assets are
+    shared (their references are bumped); other files in the project folder, thumbnails
+    included, are reflinked or hardlinked where possible. Returns the new project and
+    {"reflink", "hardlink", "copy"} file counts.
+    """
+    src = load_project(base, project_id, lazy=True)
+    src_dir = project_dir(base, project_id)
+    records = copy.deepcopy(list(src.records()))
+    new = Project(
+        id=str(uuid.uuid4()),
+        title=title or f"{src.title} (copy)",
+        theme=src.theme,
+        style_lock=src.style_lock,
+        reels=src.reels,
+        rows=src.rows,
+        orientation=src.orientation,
+        created_at=time.time(),
+        preview_config=copy.deepcopy(src.preview_config),
+        assets=LazyAssets(records),
+    )
+    dst_dir = project_dir(base, new.id)
+    counts = {"reflink": 0, "hardlink": 0, "copy": 0}
+    reflink = True
+    for root, dirs, files in os.walk(src_dir):
+        out = dst_dir / Path(root).relative_to(src_dir)
+        out.mkdir(parents=True, exist_ok=True)
+        for f in files:
+            # the snapshot is rewritten below and the journal is folded into it
+            if f.endswith(".tmp") or (out == dst_dir and f in (SNAPSHOT_FILE, JOURNAL_FILE)):
+                continue
+            how = _clone_file(Path(root) / f, out / f, reflink)
+            # one folder is one filesystem: stop trying reflinks once they fail
+            reflink = how == "reflink"
+            counts[how] += 1
+
+    save_project(base, new)
+    catalog.add_blob_refs(base, (r["meta"]["blob"] for r in records if "blob" in r["meta"]))
+    return new, counts
@@ -0,0 +1,94 @@
+# core/thumbs.py
+
+"""
+Small WebP thumbnails written next to each asset, at assets/<category>/.thumbs/<stem>-<size>.webp.
+Asset meta["thumbs"] maps each size to its project-relative path. Backfill older projects with:
+
+    python -m core.thumbs backfill [project_id ...]
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, Optional
+import os
+
+from PIL import Image
+
+from .models import Asset
+
+THUMB_SIZES = (128, 256, 512)
+THUMB_DIR = ".thumbs"
+
+
+def thumb_path(asset_file: Path, size: int) -> Path:
+    return asset_file.parent / THUMB_DIR / f"{asset_file.stem}-{size}.webp"
+
+
+def thumb_meta(asset_rel: str) -> Dict[str, str]:
+    """meta["thumbs"] for an asset at the given project-relative path."""
+    return {str(s): str(thumb_path(Path(asset_rel), s)) for s in THUMB_SIZES}
+
+
+def write_thumbnails(img: Image.Image, asset_file: Path) -> None:
+    (asset_file.parent / THUMB_DIR).mkdir(parents=True, exist_ok=True)
+    img = img.convert("RGBA")  # always a copy, so thumbnail() below can work in place
+    # largest first so each step downsamples the previous (already small) thumbnail
+    for size in sorted(THUMB_SIZES, reverse=True):
+        img.thumbnail((size, size), Image.Resampling.LANCZOS)
+        # replace rather than overwrite: the file may be hardlinked into a duplicated project
+        dst = thumb_path(asset_file, size)
+        tmp = dst.with_name(dst.name + ".tmp")
+        img.save(tmp, "WEBP", quality=80, method=4)
+        os.replace(tmp, dst)
+
+
+def ensure_thumbnails(pdir: Path, asset: Asset) -> bool:
+    """Creates missing thumbnails for an asset and records them in its meta. Returns True if meta changed."""
+    thumbs = asset.meta.get("thumbs") or {}
+    if thumbs and all((pdir / p).exists() for p in thumbs.values()):
+        return False
+    from .storage import asset_file
+
+    src = asset_file(pdir, asset)
+    if not src.exists():
+        return False
+    with Image.open(src) as img:
+        # named after the logical path, not the blob
+        write_thumbnails(img, pdir / asset.path)
+    asset.meta["thumbs"] = thumb_meta(asset.path)
+    return True
+
+
+def pick_thumb(asset: Asset, min_px: int) -> Optional[str]:
+    """The smallest recorded thumbnail at least min_px on its long side (else the largest one)."""
+    thumbs = asset.meta.get("thumbs") or {}
+    if not thumbs:
+        return None
+    sizes = sorted(int(s) for s in thumbs)
+    fit = next((s for s in sizes if s >= min_px), sizes[-1])
+    return thumbs[str(fit)]
+
+
+def backfill_project(base: Path, project_id: str) -> int:
+    """Generates thumbnails for every asset that lacks them; returns how many assets were updated."""
+    from .storage import load_project, save_project, project_dir
+
+    project = load_project(base, project_id)
+    pdir = project_dir(base, project_id)
+    changed = sum(ensure_thumbnails(pdir, a) for a in project.assets)
+    if changed:
+        save_project(base, project)
+    return changed
+
+
+if __name__ == "__main__":
+    import sys
+
+    args = sys.argv[1:]
+    if not args or args[0] != "backfill":
+        sys.exit("usage: python -m core.thumbs backfill [project_id ...]")
+    base = Path(__file__).resolve().parents[1]
+    ids = args[1:] or [p.name for p in (base / "data" / "projects").iterdir() if (p / "project.json").exists()]
+    for pid in ids:
+        print(f"{pid}: {backfill_project(base, pid)} asset(s) updated")
@@ -5,7 +5,10 @@ from pathlib import Path
 
 from core.models import Project
 from core.constants import make_default_preview_config, DEFAULT_REELS, DEFAULT_ROWS, ASSET_CATEGORIES
-from core.storage import ensure_project_dirs, save_project
+from core.storage import duplicate_project, ensure_project_dirs, save_project
+from core import catalog
+from core.thumbs import backfill_project
+from core.maintenance import collect_project, plan_project
 
 BASE = Path(__file__).resolve().parents[1]
 
@@ -45,5 +48,56 @@ if submitted:
     st.success(f"Created project: {proj.title} ({proj.id[:8]})")
     st.toast("Project created", icon="✅")
 
+active = st.session_state.get("active_project_id")
+if active:
+    st.divider()
+    with st.form("duplicate_project"):
+        st.caption("Fork the active project (e.g. to try a theme variant). Asset files are shared, not copied.")
+        dup_title = st.text_input("Title for the copy", value="", placeholder="defaults to \"<title> (copy)\"")
+        if st.form_submit_button("Duplicate project"):
+            with st.spinner("Duplicating..."):
+                dup, counts = duplicate_project(BASE, active, title=dup_title.strip() or None)
+            st.session_state.active_project_id = dup.id
+            st.success(f"Created {dup.title} ({dup.id[:8]}): {counts['reflink'] + counts['hardlink']} file(s) linked, {counts['copy']} copied.")
+
+st.divider()
+with st.expander("Maintenance", expanded=False):
+    st.caption("The sidebar lists projects from a local catalog. Rescan if project folders were copied in or edited by hand.")
+    if st.button("Rebuild project catalog"):
+        n = catalog.rebuild(BASE)
+        st.success(f"Indexed {n} project(s).")
+
+    active = st.session_state.get("active_project_id")
+    if active and st.button("Generate missing thumbnails for the active project"):
+        with st.spinner("Writing thumbnails..."):
+            n = backfill_project(BASE, active)
+        st.success(f"Updated {n} asset(s).")
+
+    if active:
+        st.caption(
+            "Clean up the active project: files no asset points at, assets whose file is missing, "
+            "and (optionally) all but the newest N assets per category."
+        )
+        keep = st.number_input("Keep newest per category (0 = keep all)", min_value=0, value=0, step=1)
+        keep_last = int(keep) or None
+        if st.button("Scan for reclaimable files"):
+            st.session_state.gc_plan = plan_project(BASE, active, keep_last=keep_last)
+        plan = st.session_state.get("gc_plan")
+        if plan is not None and plan.project_id == active:
+            st.write(plan.summary())
+            if plan.is_empty():
+                st.success("Nothing to clean up.")
+            else:
+                with st.popover("Details"):
+                    st.json({"orphans": plan.orphans, "dangling": plan.dangling, "expired": plan.expired})
+                c = st.columns(2)
+                quarantine = c[0].button("Move to quarantine", help="Files go to data/quarantine/<project id>/")
+                delete = c[1].button("Delete permanently", type="primary")
+                if quarantine or delete:
+                    with st.spinner("Cleaning up..."):
+                        done = collect_project(BASE, plan, quarantine=quarantine)
+                    st.session_state.pop("gc_plan", None)
+                    st.success(f"Removed {len(done.dangling) + len(done.expired)} record(s), freed {done.reclaim_bytes / 2**20:.1f} MB.")
+
 st.divider()
 st.caption("Next: go to **Generator** to create a Mockup concept, then **Extract** to generate individual assets.")
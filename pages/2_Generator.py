@@ -2,14 +2,12 @@
 
 import streamlit as st
 from pathlib import Path
-from PIL import Image
-import time
 
-from core.storage import load_project, add_asset, ensure_project_dirs
-from core.models import Asset
+from core.storage import load_project, ensure_project_dirs
 from core.constants import ASSET_CATEGORIES
-from core.providers import PROVIDERS
-from core.image_post import to_canvas, to_exact_symbol_size
+from core.jobs import job_manager
+from core.image_cache import open_image
+from core.providers import GOVERNOR
 
 BASE = Path(__file__).resolve().parents[1]
 
@@ -20,7 +18,7 @@ if not pid:
     st.warning("Select or create a project in the sidebar first.")
     st.stop()
 
-project = load_project(BASE, pid)
+project = load_project(BASE, pid, lazy=True)
 ensure_project_dirs(BASE, pid, ASSET_CATEGORIES)
 
 cfg = project.preview_config or {}
@@ -74,17 +72,9 @@ with colA:
             height=220,
         )
 
+    force_fresh = st.checkbox("Force fresh (skip generation cache)", value=False)
     go = st.button("Generate", type="primary", use_container_width=True)
-
-def _postprocess_for_category(img: Image.Image, cat: str) -> Image.Image:
-    if cat in ["Background", "Mockups"]:
-        return to_canvas(img, TW, TH, mode="cover")
-    if cat in ["ReelBackground", "Frame", "UI", "Splashes", "BonusGames", "FreeSpins", "Characters"]:
-        return to_canvas(img, TW, TH, mode="contain")
-    if cat == "Symbols":
-        return to_exact_symbol_size(img, 158, 178)
-    # UploadedAssets or unknown: keep as-is
-    return img.convert("RGBA")
+    st.caption("Generation runs in the background — you can queue more jobs or switch pages meanwhile.")
 
 if go:
     provider_key = st.session_state.provider  # "Gemini" or "OpenAI"
@@ -93,59 +83,52 @@ if go:
         st.error("Missing API key for selected provider.")
         st.stop()
 
-    provider = PROVIDERS["Gemini" if provider_key == "Gemini" else "OpenAI"]
-
     # For mockups: transparent OFF (we want a screenshot)
     transparent = False if category == "Mockups" else bool(st.session_state.get("transparent_bg", False))
 
-    try:
-        with st.spinner("Generating..."):
-            res = provider.generate(
-                api_key=api_key,
-                model=model,
-                prompt=base_prompt,
-                n=int(n),
-                size=size,
-                transparent=transparent,
-            )
-    except Exception as e:
-        st.error("Generation failed. Check your provider/model/key and Streamlit logs.")
-        st.exception(e)
-        st.stop()
-
-    st.success(f"Generated {len(res.images)} image(s). Saving...")
-
-    pdir = BASE / "data" / "projects" / pid / "assets" / category
-    saved = []
-    ts = int(time.time())
-
-    for idx, img in enumerate(res.images, start=1):
-        img = _postprocess_for_category(img, category)
-
-        fn = f"{name}-{ts}-{idx}.png"
-        fpath = pdir / fn
-        img.save(fpath, "PNG")
-
-        rel = str(fpath.relative_to(BASE / "data" / "projects" / pid))
-        asset = Asset.new(
-            category=category,
-            name=fn,
-            prompt=base_prompt,
-            provider=provider_key,
-            model=model,
-            path=rel,
-            meta={"size": size, "n": n, "canvas": f"{TW}x{TH}", "orientation": project.orientation},
-        )
-        add_asset(BASE, project, asset)
-        saved.append(str(fpath))
-
-    st.toast("Saved to Library", icon="🗃️")
-    st.session_state["last_generated_paths"] = saved
-
-paths = st.session_state.get("last_generated_paths", [])
-if paths:
-    st.subheader("Last generated")
-    cols = st.columns(min(4, len(paths)))
-    for i, p in enumerate(paths):
-        with cols[i % len(cols)]:
-            st.image(Image.open(p), caption=Path(p).name, use_container_width=True)
+    job = job_manager(BASE).submit_generate(
+        pid,
+        "Gemini" if provider_key == "Gemini" else "OpenAI",
+        api_key,
+        model=model,
+        prompt=base_prompt,
+        category=category,
+        name=name,
+        size=size,
+        n=int(n),
+        transparent=transparent,
+        force_fresh=force_fresh,
+        session=st.session_state.get("session_id"),
+    )
+    st.toast(f"Queued {category} x{int(n)} (job {job.id[:8]})", icon="⏳")
+
+
+@st.fragment(run_every=2)
+def jobs_panel():
+    jobs = job_manager(BASE).list(project_id=pid, kind="generate")
+    if not jobs:
+        return
+    st.subheader("Jobs")
+    q = GOVERNOR.stats()
+    if q["queued"]:
+        st.caption(f'Provider queue: {q["queued"]} waiting, {q["in_flight"]}/{q["max_in_flight"]} in flight (median wait {q["wait_p50_s"]:.1f}s)')
+    for job in jobs[:10]:
+        label = f'{job.params["category"]} x{job.params["n"]} — {job.status}'
+        if job.active:
+            st.progress(job.progress, text=f"{label}: {job.message}")
+        elif job.status == "done":
+            st.caption(f"⚠️ {label}: {job.message} — {job.error}" if job.error else f"✅ {label}: {job.message}")
+        else:
+            st.caption(f"❌ {label}: {job.error or job.message}")
+
+    done = next((j for j in jobs if j.status == "done"), None)
+    if done and done.result_paths:
+        st.subheader("Last generated")
+        paths = done.result_paths
+        cols = st.columns(min(4, len(paths)))
+        for i, p in enumerate(paths):
+            with cols[i % len(cols)]:
+                st.image(open_image(p), caption=Path(p).name, use_container_width=True)
+
+
+jobs_panel()
@@ -1,10 +1,12 @@
 import streamlit as st
 from pathlib import Path
-from PIL import Image
-from core.storage import load_project
+from core.storage import asset_file, load_project
 from core.constants import ASSET_CATEGORIES
+from core.thumbs import pick_thumb
+from core.image_cache import open_image
 
 BASE = Path(__file__).resolve().parents[1]
+CARD_PX = 360  # rendered width of one card in the 4-column wide layout
 
 st.header("🗃️ Library")
 
@@ -13,29 +15,53 @@ if not pid:
     st.warning("Select or create a project in the sidebar first.")
     st.stop()
 
-project = load_project(BASE, pid)
+project = load_project(BASE, pid, lazy=True)
 st.subheader(project.title)
 
-cat = st.selectbox("Filter category", ["All"] + ASSET_CATEGORIES, index=0)
+PAGE_SIZES = [24, 48, 96]
 
-assets = project.assets
-if cat != "All":
-    assets = [a for a in assets if a.category == cat]
+fc = st.columns([1, 2, 1])
+cat = fc[0].selectbox("Filter category", ["All"] + ASSET_CATEGORIES, index=0)
+query = fc[1].text_input("Search name or prompt", value="")
+page_size = fc[2].selectbox("Per page", PAGE_SIZES, index=0)
 
-st.caption(f"{len(assets)} asset(s)")
+assets = project.search(query.strip(), category=None if cat == "All" else cat)
 
 if not assets:
-    st.info("No assets yet. Go to Generator.")
+    st.caption("0 asset(s)")
+    st.info("No assets yet. Go to Generator." if not query and cat == "All" else "No assets match this filter.")
     st.stop()
 
+pages = (len(assets) + page_size - 1) // page_size
+page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, step=1)
+start = (int(page) - 1) * page_size
+page_assets = assets[start:start + page_size]
+
+st.caption(f"{len(assets)} asset(s) — showing {start + 1}–{start + len(page_assets)}")
+if any("thumbs" not in a.meta for a in page_assets):
+    st.caption("Some assets have no thumbnails yet; run `python -m core.thumbs backfill` to speed this page up.")
+
+pdir = BASE / "data" / "projects" / pid
+
+
+@st.fragment
+def card(a):
+    # each card is its own fragment: opening its details reruns only this card
+    p = asset_file(pdir, a)
+    thumb = pick_thumb(a, CARD_PX)
+    if thumb and (pdir / thumb).exists():
+        # a path is served as-is, without Streamlit re-encoding the image
+        st.image(str(pdir / thumb), caption=f"{a.category} • {a.name}", use_container_width=True)
+    elif p.exists():
+        st.image(open_image(p), caption=f"{a.category} • {a.name}", use_container_width=True)
+    else:
+        st.warning(f"Missing file: {a.path}")
+    if st.toggle("Details", key=f"details-{a.id}"):
+        st.write({"provider": a.provider, "model": a.model})
+        st.code(a.prompt)
+
+
 cols = st.columns(4)
-for i, a in enumerate(assets[:200]):
-    p = BASE / "data" / "projects" / pid / a.path
+for i, a in enumerate(page_assets):
     with cols[i % 4]:
-        if p.exists():
-            st.image(Image.open(p), caption=f"{a.category} • {a.name}", use_container_width=True)
-        else:
-            st.warning(f"Missing file: {a.path}")
-        with st.expander("Details", expanded=False):
-            st.write({"provider": a.provider, "model": a.model})
-            st.code(a.prompt)
+        card(a)
@@ -2,10 +2,10 @@
 
 import streamlit as st
 from pathlib import Path
-from PIL import Image
 
-from core.storage import load_project
+from core.storage import asset_file, load_project, project_dir
 from core.preview_render import render_preview
+from core.image_cache import open_image
 
 BASE = Path(__file__).resolve().parents[1]
 
@@ -16,7 +16,8 @@ if not pid:
     st.warning("Select or create a project in the sidebar first.")
     st.stop()
 
-project = load_project(BASE, pid)
+project = load_project(BASE, pid, lazy=True)
+PDIR = project_dir(BASE, pid)
 cfg = project.preview_config or {}
 TW, TH = cfg.get("canvas", {}).get("w", 1440), cfg.get("canvas", {}).get("h", 810)
 
@@ -24,16 +25,15 @@ st.subheader(project.title)
 st.caption(f"Orientation: {project.orientation} | Canvas: {TW}×{TH}")
 
 def latest(category: str):
-    for a in project.assets:
-        if a.category == category:
-            p = BASE / "data" / "projects" / pid / a.path
-            if p.exists():
-                return Image.open(p)
-    return None
+    for a in project.by_category(category):
+        p = asset_file(PDIR, a)
+        if p.exists():
+            return a.id, open_image(p)
+    return None, None
 
-bg = latest("Background")
-reel_bg = latest("ReelBackground")
-frame = latest("Frame")
+bg_key, bg = latest("Background")
+reel_key, reel_bg = latest("ReelBackground")
+frame_key, frame = latest("Frame")
 
 reels = project.reels
 rows = project.rows
@@ -42,22 +42,29 @@ st.caption("Preview composes: Background → Reel BG → Symbols grid → Frame
 
 # Build a simple symbols grid from available symbols (repeat if not enough)
 symbol_imgs = []
-for a in project.assets:
-    if a.category == "Symbols":
-        p = BASE / "data" / "projects" / pid / a.path
-        if p.exists():
-            symbol_imgs.append(Image.open(p))
+for a in project.by_category("Symbols"):
+    if len(symbol_imgs) >= rows * reels:
+        break
+    p = asset_file(PDIR, a)
+    if p.exists():
+        symbol_imgs.append((a.id, open_image(p)))
 
 grid = None
+grid_keys = None
 if symbol_imgs:
     grid = []
+    grid_keys = []
     k = 0
     for r in range(rows):
         row_imgs = []
+        row_keys = []
         for c in range(reels):
-            row_imgs.append(symbol_imgs[k % len(symbol_imgs)])
+            key, img = symbol_imgs[k % len(symbol_imgs)]
+            row_imgs.append(img)
+            row_keys.append(key)
             k += 1
         grid.append(row_imgs)
+        grid_keys.append(row_keys)
 
 rw = cfg.get("reel_window", {"x": 400, "y": 170, "w": 640, "h": 420})
 canvas = (TW, TH)
@@ -70,6 +77,8 @@ out = render_preview(
     frame=frame,
     symbols_grid=grid,
     reel_window_xywh=reel_xywh,
+    # asset files are never rewritten in place, so the asset id identifies the pixels
+    layer_keys={"background": bg_key, "reel_bg": reel_key, "frame": frame_key, "symbols": grid_keys},
 )
 
 st.image(out, use_container_width=True)
@@ -1,6 +1,8 @@
 import streamlit as st
+import datetime
 from pathlib import Path
-from core.export_utils import zip_project
+from core.export_utils import build_export, download_payload, list_exports, EXPORT_PROFILES
+from core.storage import compact_project
 
 BASE = Path(__file__).resolve().parents[1]
 
@@ -17,12 +19,51 @@ if not project_path.exists():
     st.stop()
 
 st.write("This exports the entire project folder: `project.json` + `assets/`")
+
+history = list_exports(BASE, pid)
+mode = st.radio(
+    "Archive",
+    ["Full project", "Delta since a previous export"],
+    horizontal=True,
+    disabled=not history,
+    help="Unchanged files are copied from the previous archive without recompressing them.",
+)
+since = None
+if history and mode.startswith("Delta"):
+    labels = {
+        r["id"]: f'{datetime.datetime.fromtimestamp(r["created_at"]):%Y-%m-%d %H:%M} — {r["kind"]}, {r["file_count"]} file(s)'
+        for r in history
+    }
+    since = st.selectbox("Changes since", list(labels), format_func=labels.get)
+
+profile = st.selectbox(
+    "Profile",
+    list(EXPORT_PROFILES),
+    format_func=lambda k: EXPORT_PROFILES[k].label,
+    help="Engine-ready adds engine/: symbols packed into texture atlases with a JSON frame map, "
+         "@0.5x/@1x/@2x variants of the background, reel background and frame, and a manifest.",
+)
+
 if st.button("Build ZIP", type="primary"):
-    blob = zip_project(project_path)
-    st.download_button(
-        "Download project ZIP",
-        data=blob,
-        file_name=f"slot_project_{pid[:8]}.zip",
-        mime="application/zip",
-    )
+    # fold the asset journal into project.json so the archive is self-contained
+    compact_project(BASE, pid)
+    bar = st.progress(0.0, text="Packing project...")
+
+    def _progress(done, total):
+        bar.progress(done / total if total else 1.0, text=f"Packing project... {done / 2**20:.1f} / {total / 2**20:.1f} MB")
+
+    f, record = build_export(BASE, pid, since=since, progress=_progress, profile=profile)
+    with f:
+        kind = "delta" if since else "full"
+        st.download_button(
+            f"Download {kind} ZIP",
+            data=download_payload(f),
+            file_name=f"slot_project_{pid[:8]}_{kind}_{record['id']}.zip",
+            mime="application/zip",
+        )
     st.success("ZIP ready.")
+
+if history:
+    with st.expander(f"Export history ({len(history)})"):
+        for r in history:
+            st.caption(f'{r["id"]} — {r["kind"]}, {r["file_count"]} file(s)' + (f' (since {r["since"]})' if r.get("since") else ""))
@@ -0,0 +1,62 @@
+import streamlit as st
+from pathlib import Path
+from core import metrics
+from core.image_cache import IMAGE_CACHE
+from core.providers import GOVERNOR
+
+BASE = Path(__file__).resolve().parents[1]
+PROM_FILE = BASE / "data" / "metrics.prom"
+
+st.header("⏱️ Metrics")
+
+on = st.toggle(
+    "Collect timings",
+    value=metrics.enabled(),
+    help="Process-wide, for every session on this server. Off by default; set SLOT_METRICS=1 to start enabled.",
+)
+if on != metrics.enabled():
+    metrics.enable(on)
+
+c = st.columns(2)
+if c[0].button("Reset"):
+    metrics.reset()
+if c[1].button("Write Prometheus file"):
+    metrics.write_prometheus(PROM_FILE)
+    st.success(f"Wrote {PROM_FILE.relative_to(BASE)}")
+
+
+@st.fragment(run_every=5)
+def metrics_panel():
+    snap = metrics.snapshot()
+    st.subheader("Stage timings")
+    if snap["timings"]:
+        st.caption("Percentiles over the last %d samples of each series." % metrics.ROLLING_WINDOW)
+        st.dataframe(snap["timings"], use_container_width=True, hide_index=True)
+    else:
+        st.info("No timings recorded yet." if metrics.enabled() else "Collection is off.")
+
+    if snap["counters"]:
+        st.subheader("Counters")
+        st.dataframe(snap["counters"], use_container_width=True, hide_index=True)
+
+    st.subheader("Provider queue")
+    q = GOVERNOR.stats()
+    m = st.columns(4)
+    m[0].metric("In flight", f'{q["in_flight"]} / {q["max_in_flight"]}')
+    m[1].metric("Waiting", q["queued"], help=f'{q["queued_sessions"]} session(s); by priority: {q["queued_by_priority"] or "—"}')
+    m[2].metric("Median wait", f'{q["wait_p50_s"]:.2f} s')
+    m[3].metric("Max wait", f'{q["wait_max_s"]:.2f} s')
+
+    st.subheader("Decoded image cache")
+    s = IMAGE_CACHE.stats()
+    lookups = s["hits"] + s["misses"]
+    m = st.columns(3)
+    m[0].metric("Hit rate", f'{s["hits"] / lookups:.0%}' if lookups else "—")
+    m[1].metric("Entries", s["entries"])
+    m[2].metric("Memory", f'{s["bytes"] / 2**20:.0f} / {s["budget_bytes"] / 2**20:.0f} MB')
+
+    if metrics.enabled():
+        metrics.write_prometheus(PROM_FILE)
+
+
+metrics_panel()
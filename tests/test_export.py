@@ -0,0 +1,71 @@
+# tests/test_export.py
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+import io
+import json
+import zipfile
+
+from benchmarks.fixtures import make_project, random_rgba
+from core import export_utils, storage
+from core.export_utils import build_export, exports_dir
+
+
+def _check(f, project_path, expected):
+    data = f.read()
+    f.close()
+    z = zipfile.ZipFile(io.BytesIO(data))
+    assert z.testzip() is None
+    for arc in expected:
+        assert z.read(arc) == (project_path / arc).read_bytes(), arc
+    return z
+
+
+def test_full_incremental_and_delta_exports_are_valid(tmp_path, monkeypatch):
+    copied = []
+    real_copy = export_utils._copy_raw_entry
+    monkeypatch.setattr(export_utils, "_copy_raw_entry", lambda src, info, dst: (copied.append(info.filename), real_copy(src, info, dst)))
+
+    project = make_project(tmp_path, 6, with_files=4, file_size=(64, 64))
+    pdir = storage.project_dir(tmp_path, project.id)
+    pngs = sorted(p.relative_to(pdir).as_posix() for p in pdir.rglob("*.png"))
+
+    f, first = build_export(tmp_path, project.id)
+    _check(f, pdir, pngs + ["project.json"])
+
+    # one file changes, one is added; the rest are copied raw from last.zip
+    random_rgba((64, 64), seed=99).save(pdir / pngs[0], "PNG")
+    added = "assets/Symbols/extra.png"
+    random_rgba((64, 64), seed=100).save(pdir / added, "PNG")
+
+    f, second = build_export(tmp_path, project.id)
+    z = _check(f, pdir, pngs + [added, "project.json"])
+    assert set(pngs[1:]) <= set(copied)
+    assert pngs[0] not in copied and added not in copied
+
+    f, delta = build_export(tmp_path, project.id, since=first["id"])
+    z = _check(f, pdir, [pngs[0], added])
+    changes = json.loads(z.read("delta.json"))
+    assert set(changes["changed"]) == {pngs[0], added}
+    assert not set(pngs[1:]) & set(z.namelist())
+
+
+def test_concurrent_full_exports(tmp_path):
+    project = make_project(tmp_path, 4, with_files=4, file_size=(64, 64))
+    with ThreadPoolExecutor(3) as pool:
+        results = list(pool.map(lambda _: build_export(tmp_path, project.id), range(3)))
+    for f, _ in results:
+        assert zipfile.ZipFile(f).testzip() is None
+        f.close()
+
+
+def test_unreadable_last_manifest_means_no_previous_export(tmp_path):
+    project = make_project(tmp_path, 4, with_files=2, file_size=(64, 64))
+    f, _ = build_export(tmp_path, project.id)
+    f.close()
+    (exports_dir(tmp_path, project.id) / "last.json").write_text('{"id": "trunc', encoding="utf-8")
+
+    f, _ = build_export(tmp_path, project.id)
+    assert zipfile.ZipFile(f).testzip() is None
+    f.close()
@@ -0,0 +1,48 @@
+# tests/test_maintenance.py
+
+from __future__ import annotations
+
+from pathlib import Path
+
+from benchmarks.fixtures import random_rgba
+from core import maintenance, storage
+from core.models import Asset, Project
+
+
+def _project(base: Path) -> Project:
+    project = Project.new(
+        title="t", theme="", style_lock="", reels=5, rows=3, preview_config={}, orientation="Landscape",
+    )
+    storage.ensure_project_dirs(base, project.id, ["Symbols"])
+    storage.save_project(base, project)
+    return project
+
+
+def _add(base: Path, project: Project, name: str, created_at: float) -> Asset:
+    rel = f"assets/Symbols/{name}.png"
+    random_rgba((16, 16), seed=int(created_at)).save(storage.project_dir(base, project.id) / rel, "PNG")
+    a = Asset.new(category="Symbols", name=name, prompt="", provider="Stub", model="stub-1", path=rel)
+    a.created_at = created_at
+    storage.add_asset(base, project, a)
+    return a
+
+
+def test_apply_only_removes_what_the_reviewed_plan_listed(tmp_path):
+    project = _project(tmp_path)
+    for i in range(3):
+        _add(tmp_path, project, f"s{i}", 1000.0 + i)
+    pdir = storage.project_dir(tmp_path, project.id)
+
+    plan = maintenance.plan_project(tmp_path, project.id, keep_last=2)
+    assert [storage.load_project(tmp_path, project.id).assets[-1].id] == plan.expired
+    assert plan.files and all((pdir / f).exists() for f in plan.files)
+
+    # saved between review and apply: pushes s1 past keep_last too, but it wasn't in the report
+    _add(tmp_path, project, "s3", 2000.0)
+    done = maintenance.collect_project(tmp_path, plan, quarantine=False)
+
+    assert done.expired == plan.expired
+    names = [a.name for a in storage.load_project(tmp_path, project.id).assets]
+    assert names == ["s3", "s2", "s1"]
+    assert (pdir / "assets/Symbols/s1.png").exists()
+    assert not (pdir / "assets/Symbols/s0.png").exists()
@@ -0,0 +1,122 @@
+# tests/test_storage.py
+
+from __future__ import annotations
+
+from pathlib import Path
+import shutil
+
+from core import catalog, storage
+from core.models import Asset, Project
+
+
+def _project(base: Path) -> Project:
+    project = Project.new(
+        title="t", theme="", style_lock="", reels=5, rows=3, preview_config={}, orientation="Landscape",
+    )
+    storage.save_project(base, project)
+    return project
+
+
+def _asset(name: str) -> Asset:
+    return Asset.new(category="Symbols", name=name, prompt="", provider="Stub", model="stub-1",
+                     path=f"assets/Symbols/{name}.png", meta={"thumbs": {}})
+
+
+def _names_on_disk(base: Path, project_id: str):
+    storage.invalidate_project(base, project_id)  # what a restarted process would see
+    return sorted(a.name for a in storage.load_project(base, project_id).assets)
+
+
+def test_append_after_torn_tail_keeps_later_records(tmp_path):
+    project = _project(tmp_path)
+    storage.add_asset(tmp_path, project, _asset("a1"))
+    jp = storage.project_dir(tmp_path, project.id) / storage.JOURNAL_FILE
+    with open(jp, "a", encoding="utf-8") as f:
+        f.write('{"op":"add","asset":{"id":"torn')  # crash mid-append
+
+    project = storage.load_project(tmp_path, project.id)
+    storage.invalidate_project(tmp_path, project.id)
+    project = storage.load_project(tmp_path, project.id)
+    storage.add_asset(tmp_path, project, _asset("a2"))
+    storage.add_asset(tmp_path, project, _asset("a3"))
+
+    assert _names_on_disk(tmp_path, project.id) == ["a1", "a2", "a3"]
+    assert jp.read_bytes().endswith(b"\n")
+
+
+def test_compaction_from_stale_copy_keeps_other_writers_assets(tmp_path, monkeypatch):
+    project = _project(tmp_path)
+    first = storage.load_project(tmp_path, project.id)
+    storage.invalidate_project(tmp_path, project.id)
+    second = storage.load_project(tmp_path, project.id)
+    assert first is not second
+
+    storage.add_asset(tmp_path, first, _asset("from-first"))
+    monkeypatch.setattr(storage, "JOURNAL_COMPACT_BYTES", 0)
+    storage.add_asset(tmp_path, second, _asset("from-second"))
+
+    assert not (storage.project_dir(tmp_path, project.id) / storage.JOURNAL_FILE).exists()
+    assert _names_on_disk(tmp_path, project.id) == ["from-first", "from-second"]
+
+
+def test_remove_assets_from_stale_copy_keeps_other_writers_assets(tmp_path):
+    project = _project(tmp_path)
+    first = storage.load_project(tmp_path, project.id)
+    storage.invalidate_project(tmp_path, project.id)
+    second = storage.load_project(tmp_path, project.id)
+
+    doomed = _asset("doomed")
+    storage.add_asset(tmp_path, second, doomed)
+    storage.add_asset(tmp_path, first, _asset("kept"))
+    storage.remove_assets(tmp_path, second, [doomed.id])
+
+    assert _names_on_disk(tmp_path, project.id) == ["kept"]
+
+
+def test_append_through_stale_copy_does_not_poison_cache(tmp_path):
+    project = _project(tmp_path)
+    first = storage.load_project(tmp_path, project.id)
+    storage.invalidate_project(tmp_path, project.id)  # e.g. evicted by catalog.rebuild
+    second = storage.load_project(tmp_path, project.id)
+
+    storage.add_asset(tmp_path, second, _asset("from-job1"))
+    storage.add_asset(tmp_path, first, _asset("from-job2"))
+
+    cached = storage.load_project(tmp_path, project.id)
+    assert sorted(a.name for a in cached.assets) == ["from-job1", "from-job2"]
+
+
+def test_list_projects_drops_folders_removed_by_hand(tmp_path):
+    kept, gone = _project(tmp_path), _project(tmp_path)
+    shutil.rmtree(storage.project_dir(tmp_path, gone.id))
+
+    assert [p["id"] for p in storage.list_projects(tmp_path)] == [kept.id]
+    assert [p["id"] for p in catalog.list_projects(tmp_path)] == [kept.id]
+
+
+def test_compaction_from_stale_copy_keeps_chronological_order(tmp_path, monkeypatch):
+    project = _project(tmp_path)
+    stale = storage.load_project(tmp_path, project.id)
+    storage.invalidate_project(tmp_path, project.id)
+    other = storage.load_project(tmp_path, project.id)
+
+    older, newer = _asset("older"), _asset("newer")
+    older.created_at, newer.created_at = 1000.0, 2000.0
+    storage.add_asset(tmp_path, other, older)
+    monkeypatch.setattr(storage, "JOURNAL_COMPACT_BYTES", 0)
+    storage.add_asset(tmp_path, stale, newer)
+
+    assert [a.name for a in stale.assets] == ["newer", "older"]
+    assert stale.latest("Symbols").name == "newer"
+    storage.invalidate_project(tmp_path, project.id)
+    assert [a.name for a in storage.load_project(tmp_path, project.id).assets] == ["newer", "older"]
+
+
+def test_catalog_asset_counts_follow_adds_and_removes(tmp_path):
+    project = _project(tmp_path)
+    a, b = _asset("a"), _asset("b")
+    storage.add_assets(tmp_path, project, [a, b])
+    assert catalog.asset_counts(tmp_path, project.id) == {"Symbols": 2}
+
+    storage.remove_assets(tmp_path, project, [a.id])
+    assert catalog.asset_counts(tmp_path, project.id) == {"Symbols": 1}